@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark Suite - Throughput, latency and memory of the search and design-system paths
+
+Runs each benchmark on the shipped data and on synthetically scaled copies
+of the data directory (every CSV's rows repeated 10x and 100x; 1000x only
+when asked for with --scales), and reports throughput, p50/p99 latency and
+tracemalloc peak memory. Results can be written as JSON and compared against
+a saved baseline; a p50 latency regression beyond the threshold fails the run.
+
+Usage: python bench.py [--scales 1,10,100,1000] [--only search,fit] [--min-time 0.5]
+                       [--json results.json] [--baseline baseline.json] [--threshold 10]
+"""
+
+import csv
+import json
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import core
+import design_system
+from core import BM25, CSV_CONFIG, _document, _index_options, _load_csv, _search_csv
+
+# ============ CONFIGURATION ============
+DEFAULT_SCALES = (1, 10, 100)  # 1000x is opt-in: --scales 1,10,100,1000
+MIN_TIME = 0.5  # Seconds each benchmark is timed for
+MIN_RUNS = 5  # Timed calls per benchmark, however slow
+MAX_RUNS = 10000  # Timed calls per benchmark, however fast
+REGRESSION_THRESHOLD = 10.0  # Allowed p50 slowdown against the baseline, in percent
+
+BENCH_DOMAIN = "style"  # Domain used by the BM25-level benchmarks
+BENCH_STACK = "react"
+
+QUERIES = [
+    "glassmorphism dark",
+    "minimal clean saas dashboard",
+    "fintech trust blue",
+    "e-commerce luxury serif",
+    "playful gaming neon",
+    "healthcare accessibility contrast",
+    "landing page hero cta",
+    "server component suspense"
+]
+
+
+# ============ SCALED DATA ============
+def scale_data(source: Path, target: Path, factor: int) -> None:
+    """Copy a data directory with the rows of every CSV repeated factor times."""
+    for filepath in source.rglob("*.csv"):
+        destination = target / filepath.relative_to(source)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        if factor == 1:
+            shutil.copyfile(filepath, destination)
+            continue
+        with open(filepath, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            rows = list(reader)
+        with open(destination, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            if header is not None:
+                writer.writerow(header)
+            for _ in range(factor):
+                writer.writerows(rows)
+
+
+def use_data(data_dir: Path, cache_dir: Path) -> None:
+    """Point core and design_system at a data directory, dropping every in-process index."""
+    core.DATA_DIR = design_system.DATA_DIR = data_dir
+    core.CACHE_DIR = cache_dir
+    core.SNAPSHOT_FILE = cache_dir / "data.snap"
+    for table in (core._INDEXES, core._VOCABULARY, core._ROUTER_LEXICON, core._DICTIONARY, core._UNIFIED,
+                  core._SNAPSHOT):
+        table.clear()
+    core.clear_result_cache()
+
+
+# ============ BENCHMARKS ============
+def _domain_index():
+    """(config, options, documents, bm25) of the benchmark domain."""
+    config = CSV_CONFIG[BENCH_DOMAIN]
+    options = _index_options(config, config["search_cols"])
+    data = _load_csv(core.DATA_DIR / config["file"])
+    documents = [_document(row, config["search_cols"], options["weights"]) for row in data]
+    bm25 = core._get_index(core.DATA_DIR / config["file"], config["search_cols"], config["output_cols"], **options)[1]
+    return config, options, documents, bm25
+
+
+def benchmarks() -> dict:
+    """Name -> (setup, call) for every benchmark; setup() runs untimed before each timed call(query)"""
+    config, options, documents, bm25 = _domain_index()
+    filepath = core.DATA_DIR / config["file"]
+    generator = design_system.DesignSystemGenerator()
+
+    # Setups clear memoised query analyses and cached results so they do not hide the work
+    def forget_queries():
+        bm25.analyzer._queries.clear()
+
+    def fresh_search():
+        core.clear_result_cache()
+        core.DEFAULT_ANALYZER._queries.clear()
+        forget_queries()
+
+    def fit(_query):
+        BM25(analyzer=options["analyzer"]).fit(documents, field_weights=options["weights"])
+
+    return {
+        "tokenize": (forget_queries, bm25.tokenize),
+        "fit": (None, fit),
+        "score": (forget_queries, bm25.score),
+        "_search_csv": (fresh_search, lambda query: _search_csv(filepath, config["search_cols"], config["output_cols"],
+                                                                query, core.MAX_RESULTS, **options)),
+        "search": (fresh_search, core.search),
+        "search_stack": (fresh_search, lambda query: core.search_stack(query, BENCH_STACK)),
+        "detect_domain": (fresh_search, core.detect_domain),
+        "design_system_ascii": (fresh_search, lambda query: design_system.generate_design_system(
+            query, "Bench", "ascii", generator)),
+        "design_system_markdown": (fresh_search, lambda query: design_system.generate_design_system(
+            query, "Bench", "markdown", generator))
+    }
+
+
+def _percentile(samples: list, fraction: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    return samples[min(len(samples) - 1, max(0, round(fraction * len(samples) + 0.5) - 1))]
+
+
+def run_benchmark(setup, call, min_time: float = MIN_TIME) -> dict:
+    """Time call over the queries until min_time has passed, then measure peak memory of one pass."""
+    # Warm-up over every query: lazy imports, index loads, thread pools, and the global dictionary
+    # built on the first token an index lacks
+    for query in QUERIES:
+        if setup:
+            setup()
+        call(query)
+
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < MAX_RUNS and (len(latencies) < MIN_RUNS or time.perf_counter() - started < min_time):
+        query = QUERIES[len(latencies) % len(QUERIES)]
+        if setup:
+            setup()
+        start = time.perf_counter()
+        call(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    # Separate pass: tracemalloc slows allocation-heavy code too much to time under it
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        call(QUERIES[0])
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "runs": len(latencies),
+        "ops_per_sec": len(latencies) / sum(latencies),
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "peak_kib": peak / 1024
+    }
+
+
+def run_suite(scales=DEFAULT_SCALES, only=None, min_time: float = MIN_TIME, progress=None) -> dict:
+    """Results keyed "<benchmark>@<scale>x" for every scale and selected benchmark."""
+    source = core.DATA_DIR
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="uipro-bench-") as tmp:
+        try:
+            for scale in scales:
+                data_dir = Path(tmp) / f"data-{scale}x"
+                scale_data(source, data_dir, scale)
+                use_data(data_dir, Path(tmp) / f"cache-{scale}x")
+                for name, (setup, call) in benchmarks().items():
+                    if only and name not in only:
+                        continue
+                    key = f"{name}@{scale}x"
+                    results[key] = run_benchmark(setup, call, min_time)
+                    if progress:
+                        progress(key, results[key])
+                shutil.rmtree(data_dir)
+        finally:
+            use_data(source, Path(__file__).parent.parent / ".cache")
+    return results
+
+
+# ============ BASELINE COMPARISON ============
+def compare(results: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """(key, baseline p50, p50, change %, regressed) for benchmarks present in both runs."""
+    rows = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if not before:
+            continue
+        change = (result["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100 if before["p50_ms"] else 0.0
+        rows.append((key, before["p50_ms"], result["p50_ms"], change, change > threshold))
+    return rows
+
+
+def _format_result(key: str, result: dict) -> str:
+    return (f"{key:<32} {result['ops_per_sec']:>11.1f}/s  p50 {result['p50_ms']:>9.3f} ms  "
+            f"p99 {result['p99_ms']:>9.3f} ms  peak {result['peak_kib']:>10.1f} KiB  ({result['runs']} runs)")
+
+
+# ============ CLI SUPPORT ============
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark search and design-system generation")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="Comma-separated data scale factors (default: 1,10,100)")
+    parser.add_argument("--only", default=None, help="Comma-separated benchmark names to run")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="Seconds to time each benchmark")
+    parser.add_argument("--json", metavar="FILE", help="Write machine-readable results to FILE")
+    parser.add_argument("--baseline", metavar="FILE", help="Compare p50 latencies against a saved --json FILE")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Allowed p50 slowdown against the baseline, in percent")
+
+    args = parser.parse_args()
+    scales = [int(scale) for scale in args.scales.split(",") if scale.strip()]
+    only = {name.strip() for name in args.only.split(",")} if args.only else None
+
+    results = run_suite(scales, only, args.min_time,
+                        progress=lambda key, result: print(_format_result(key, result), flush=True))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "scales": scales,
+                "results": results
+            }, f, indent=2)
+
+    failed = False
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)["results"]
+        print(f"\nAgainst {args.baseline} (threshold +{args.threshold:.1f}%):")
+        for key, before, after, change, regressed in compare(results, baseline, args.threshold):
+            verdict = "REGRESSION" if regressed else ("faster" if change < 0 else "ok")
+            print(f"{key:<32} {before:>9.3f} -> {after:>9.3f} ms  {change:+7.1f}%  {verdict}")
+            failed = failed or regressed
+        print("FAIL: p50 regression beyond threshold" if failed else "OK")
+    sys.exit(1 if failed else 0)
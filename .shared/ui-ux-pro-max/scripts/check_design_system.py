@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Design System Picks Check - Keeps generated styles stable for the shipped product types
+
+Generates a design system for every product type in products.csv and
+compares the category and style picked against the recorded picks in
+design_picks.json. Search and ranking changes that move a pick show up
+here; re-record with --update once a new pick is confirmed to be right
+(e.g. the reasoning rule's first style priority).
+
+Usage: python check_design_system.py [--update] [--picks design_picks.json]
+"""
+
+import json
+import sys
+from pathlib import Path
+
+from core import DATA_DIR, load_rows
+from design_system import DesignSystemGenerator
+
+# ============ CONFIGURATION ============
+PICKS_FILE = Path(__file__).parent / "design_picks.json"
+PRODUCTS_FILE = "products.csv"
+
+
+# ============ CHECK ============
+def picks(generator: DesignSystemGenerator = None) -> dict:
+    """Product type -> [category, style name] generated for it."""
+    generator = generator or DesignSystemGenerator()
+    result = {}
+    for row in load_rows(DATA_DIR / PRODUCTS_FILE):
+        product_type = row.get("Product Type", "")
+        design_system = generator.generate(product_type)
+        result[product_type] = [design_system["category"], design_system["style"]["name"]]
+    return result
+
+
+def compare(current: dict, recorded: dict) -> list:
+    """(product type, recorded pick, current pick) for every pick that differs."""
+    return [(product_type, recorded.get(product_type), pick)
+            for product_type, pick in current.items() if recorded.get(product_type) != pick]
+
+
+# ============ CLI SUPPORT ============
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check design-system style picks against recorded picks")
+    parser.add_argument("--picks", type=Path, default=PICKS_FILE, help="Recorded picks file")
+    parser.add_argument("--update", action="store_true", help="Record the current picks instead of checking")
+
+    args = parser.parse_args()
+    current = picks()
+
+    if args.update:
+        with open(args.picks, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        print(f"Recorded {len(current)} picks to {args.picks}")
+        sys.exit(0)
+
+    with open(args.picks, encoding='utf-8') as f:
+        recorded = json.load(f)
+    changed = compare(current, recorded)
+    for product_type, before, after in changed:
+        print(f"{product_type:<40} {before} -> {after}")
+    print(f"FAIL: {len(changed)} of {len(current)} picks changed" if changed else f"OK ({len(current)} picks)")
+    sys.exit(1 if changed else 0)
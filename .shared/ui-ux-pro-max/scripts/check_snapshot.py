@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Snapshot Rows Check - Keeps load_rows() identical with and without the data snapshot
+
+Packs a fresh snapshot of data/ in memory, serves load_rows() from it and
+compares every CSV's rows against parsing the CSV itself (the path taken
+when no current snapshot exists): same plain dicts, same column order,
+same cell values, including the None cells of short rows.
+
+Usage: python check_snapshot.py
+"""
+
+import sys
+
+from core import DATA_DIR, _load_csv, load_rows, use_snapshot
+from snapshot import Snapshot, pack
+
+
+# ============ CHECK ============
+def differences() -> list:
+    """(CSV name, first differing row number or None for the row count) for every CSV that differs."""
+    use_snapshot(Snapshot.from_buffer(pack()))
+    try:
+        found = []
+        for filepath in sorted(DATA_DIR.rglob("*.csv")):
+            name = filepath.relative_to(DATA_DIR).as_posix()
+            expected = _load_csv(filepath)
+            rows = load_rows(filepath)
+            if len(rows) != len(expected):
+                found.append((name, None))
+                continue
+            for number, (row, csv_row) in enumerate(zip(rows, expected), 1):
+                if type(row) is not dict or list(row.items()) != list(csv_row.items()):
+                    found.append((name, number))
+                    break
+        return found
+    finally:
+        use_snapshot(None)
+
+
+# ============ CLI SUPPORT ============
+if __name__ == "__main__":
+    changed = differences()
+    for name, number in changed:
+        print(f"{name:<40} " + ("row count differs" if number is None else f"row {number} differs"))
+    total = sum(1 for _ in DATA_DIR.rglob("*.csv"))
+    print(f"FAIL: {len(changed)} of {total} tables differ" if changed else f"OK ({total} tables)")
+    sys.exit(1 if changed else 0)
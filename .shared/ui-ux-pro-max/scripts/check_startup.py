@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Startup Budget Check - Keeps a plain search.py query close to bare interpreter startup
+
+Runs `search.py "<query>" --local` under `-X importtime` and compares the
+import cost against `python -c pass`. Fails when the extra import time
+exceeds the budget, or when the plain search path imports a module that
+belongs to another code path (design system, server, JSON output, CSV
+parsing with a warm index cache).
+
+Usage: python check_startup.py [--budget 40] [--runs 5] [--query "glassmorphism"]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# ============ CONFIGURATION ============
+SEARCH_SCRIPT = Path(__file__).parent / "search.py"
+STARTUP_BUDGET_MS = 40.0  # Import time allowed on top of bare interpreter startup
+DEFAULT_QUERY = "glassmorphism dark"
+
+# Modules a plain domain search must not import
+FORBIDDEN_MODULES = {
+    "design_system", "server", "json", "csv", "hashlib",
+    "http.client", "http.server", "threading", "numpy"
+}
+
+
+# ============ MEASUREMENT ============
+def _run(args: list) -> tuple:
+    """Run the interpreter with -X importtime; return (wall ms, {top-level module: cumulative us}, all modules)."""
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)  # Measure with cached bytecode, as users run it
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    top_level = {}
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        if not name[1:].startswith(" "):
+            top_level[name.strip()] = int(cumulative)
+    return wall_ms, top_level, modules
+
+
+def measure(query: str = DEFAULT_QUERY, runs: int = 5) -> dict:
+    """Best-of-N import and wall time for a plain search versus bare startup."""
+    search_args = [str(SEARCH_SCRIPT), query, "--local"]
+    _run(search_args)  # Warm the index cache and bytecode
+
+    bare = [_run(["-c", "pass"]) for _ in range(runs)]
+    plain = [_run(search_args) for _ in range(runs)]
+
+    bare_import_us = min(sum(top.values()) for _, top, _ in bare)
+    plain_import_us = min(sum(top.values()) for _, top, _ in plain)
+    imported = set().union(*(modules for _, _, modules in plain))
+    slowest = sorted(plain[0][1].items(), key=lambda item: item[1], reverse=True)
+
+    return {
+        "bare_wall_ms": statistics.median(wall for wall, _, _ in bare),
+        "search_wall_ms": statistics.median(wall for wall, _, _ in plain),
+        "import_overhead_ms": (plain_import_us - bare_import_us) / 1000,
+        "forbidden": sorted(FORBIDDEN_MODULES & imported),
+        "top_imports": [(name, us / 1000) for name, us in slowest[:8]]
+    }
+
+
+# ============ CLI SUPPORT ============
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check search.py startup budget")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_MS, help="Allowed import overhead in ms")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per measurement")
+    parser.add_argument("--query", default=DEFAULT_QUERY, help="Query to search")
+
+    args = parser.parse_args()
+    report = measure(args.query, args.runs)
+
+    print(f"Bare interpreter:  {report['bare_wall_ms']:.1f} ms wall")
+    print(f"search.py:         {report['search_wall_ms']:.1f} ms wall")
+    print(f"Import overhead:   {report['import_overhead_ms']:.1f} ms (budget {args.budget:.1f} ms)")
+    print("Slowest imports:   " + ", ".join(f"{name} {ms:.1f}ms" for name, ms in report["top_imports"]))
+
+    failed = False
+    if report["import_overhead_ms"] > args.budget:
+        print("FAIL: import overhead exceeds budget")
+        failed = True
+    if report["forbidden"]:
+        print(f"FAIL: plain search imported {', '.join(report['forbidden'])}")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Client - Forwards search requests to a running search server
+
+Kept separate from server.py so a plain CLI search only pays for a file
+lookup when no server is running; HTTP and JSON support are imported only
+once a server has advertised itself.
+"""
+
+from pathlib import Path
+
+# ============ CONFIGURATION ============
+STATE_FILE = Path(__file__).parent.parent / ".cache" / "server.json"
+CLIENT_TIMEOUT = 10.0
+
+
+# ============ CLIENT ============
+def forward(request: dict):
+    """Send a request to the running server; None when no server answers."""
+    try:
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            state = f.read()
+    except OSError:
+        return None
+
+    import http.client
+    import json
+
+    try:
+        state = json.loads(state)
+        conn = http.client.HTTPConnection(state["host"], state["port"], timeout=CLIENT_TIMEOUT)
+    except (ValueError, KeyError, TypeError):
+        return None
+
+    try:
+        body = json.dumps(request, ensure_ascii=False).encode("utf-8")
+        conn.request("POST", "/", body=body, headers={"Content-Type": "application/json"})
+        response = json.loads(conn.getresponse().read())
+    except (OSError, ValueError, http.client.HTTPException):
+        return None
+    finally:
+        conn.close()
+    return response.get("result") if isinstance(response, dict) else None
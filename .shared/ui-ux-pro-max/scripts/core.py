@@ -4,70 +4,100 @@
 UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
-import csv
+import os
+import pickle
 import re
+import sys
+from array import array
+from _thread import allocate_lock, get_ident
 from pathlib import Path
 from math import log
-from collections import defaultdict
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from heapq import heappush, heapreplace
+from time import perf_counter
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
+CACHE_DIR = Path(__file__).parent.parent / ".cache"
+CACHE_VERSION = 12  # Bump when the pickled index layout changes
+SNAPSHOT_FILE = CACHE_DIR / "data.snap"  # Built by snapshot.py
 MAX_RESULTS = 3
+ALL_DOMAINS = "all"  # Pseudo-domain searching every domain and stack at once
+RESULT_CACHE_SIZE = 256  # Max cached search results per process
+FUZZY_QUERIES = True  # Correct or prefix-expand query tokens an index lacks (see Lexicon)
 
+# search_cols are indexed as BM25F fields; field_weights boosts matches in
+# the listed columns (unlisted columns weigh 1.0). analyzer holds Analyzer
+# options (min_length, cjk_bigrams, stem) for the domain's index.
 CSV_CONFIG = {
     "style": {
         "file": "styles.csv",
         "search_cols": ["Style Category", "Keywords", "Best For", "Type"],
+        "field_weights": {"Style Category": 2.0, "Keywords": 1.5},
         "output_cols": ["Style Category", "Type", "Keywords", "Primary Colors", "Effects & Animation", "Best For", "Performance", "Accessibility", "Framework Compatibility", "Complexity"]
     },
     "prompt": {
         "file": "prompts.csv",
         "search_cols": ["Style Category", "AI Prompt Keywords (Copy-Paste Ready)", "CSS/Technical Keywords"],
+        "field_weights": {"Style Category": 2.0},
         "output_cols": ["Style Category", "AI Prompt Keywords (Copy-Paste Ready)", "CSS/Technical Keywords", "Implementation Checklist"]
     },
     "color": {
         "file": "colors.csv",
         "search_cols": ["Product Type", "Keywords", "Notes"],
+        "field_weights": {"Product Type": 2.0, "Keywords": 1.5},
         "output_cols": ["Product Type", "Keywords", "Primary (Hex)", "Secondary (Hex)", "CTA (Hex)", "Background (Hex)", "Text (Hex)", "Border (Hex)", "Notes"]
     },
     "chart": {
         "file": "charts.csv",
         "search_cols": ["Data Type", "Keywords", "Best Chart Type", "Accessibility Notes"],
+        "field_weights": {"Data Type": 2.0, "Keywords": 1.5},
         "output_cols": ["Data Type", "Keywords", "Best Chart Type", "Secondary Options", "Color Guidance", "Accessibility Notes", "Library Recommendation", "Interactive Level"]
     },
     "landing": {
         "file": "landing.csv",
         "search_cols": ["Pattern Name", "Keywords", "Conversion Optimization", "Section Order"],
+        "field_weights": {"Pattern Name": 2.0, "Keywords": 1.5},
         "output_cols": ["Pattern Name", "Keywords", "Section Order", "Primary CTA Placement", "Color Strategy", "Conversion Optimization"]
     },
     "product": {
         "file": "products.csv",
         "search_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Key Considerations"],
+        "field_weights": {"Product Type": 2.0, "Keywords": 1.5},
         "output_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Secondary Styles", "Landing Page Pattern", "Dashboard Style (if applicable)", "Color Palette Focus"]
     },
     "ux": {
         "file": "ux-guidelines.csv",
         "search_cols": ["Category", "Issue", "Description", "Platform"],
+        "field_weights": {"Issue": 2.0, "Category": 1.25},
+        "analyzer": {"stem": True},
         "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
     },
     "typography": {
         "file": "typography.csv",
         "search_cols": ["Font Pairing Name", "Category", "Mood/Style Keywords", "Best For", "Heading Font", "Body Font"],
+        "field_weights": {"Font Pairing Name": 2.0, "Mood/Style Keywords": 1.5},
         "output_cols": ["Font Pairing Name", "Category", "Heading Font", "Body Font", "Mood/Style Keywords", "Best For", "Google Fonts URL", "CSS Import", "Tailwind Config", "Notes"]
     },
     "icons": {
         "file": "icons.csv",
         "search_cols": ["Category", "Icon Name", "Keywords", "Best For"],
+        "field_weights": {"Icon Name": 2.0, "Keywords": 1.5},
         "output_cols": ["Category", "Icon Name", "Keywords", "Library", "Import Code", "Usage", "Best For", "Style"]
     },
     "react": {
         "file": "react-performance.csv",
         "search_cols": ["Category", "Issue", "Keywords", "Description"],
+        "field_weights": {"Issue": 2.0, "Keywords": 1.5},
+        "analyzer": {"stem": True},
         "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
     },
     "web": {
         "file": "web-interface.csv",
         "search_cols": ["Category", "Issue", "Keywords", "Description"],
+        "field_weights": {"Issue": 2.0, "Keywords": 1.5},
+        "analyzer": {"stem": True},
         "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
     }
 }
@@ -89,142 +119,2090 @@ STACK_CONFIG = {
 # Common columns for all stacks
 _STACK_COLS = {
     "search_cols": ["Category", "Guideline", "Description", "Do", "Don't"],
+    "field_weights": {"Guideline": 2.0, "Category": 1.25},
+    "analyzer": {"stem": True},
     "output_cols": ["Category", "Guideline", "Description", "Do", "Don't", "Code Good", "Code Bad", "Severity", "Docs URL"]
 }
 
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
 
+# ============ PROFILING ============
+class Span:
+    """Accumulated time, calls and traced allocations of one named stage, with its child stages"""
+
+    __slots__ = ("name", "seconds", "calls", "allocated", "children")
+
+    def __init__(self, name):
+        self.name = name
+        self.seconds = 0.0
+        self.calls = 0
+        self.allocated = 0  # Net bytes traced by tracemalloc while open
+        self.children = {}
+
+    def child(self, name):
+        span = self.children.get(name)
+        if span is None:
+            span = self.children.setdefault(name, Span(name))
+        return span
+
+    def as_dict(self, allocations=True):
+        report = {"name": self.name, "ms": self.seconds * 1000, "calls": self.calls}
+        if allocations:
+            report["allocated_kib"] = self.allocated / 1024
+        report["children"] = [child.as_dict(allocations) for child in self.children.values()]
+        return report
+
+
+class _OpenSpan:
+    """Context manager timing one entry into a Span, nested under the thread's current span"""
+
+    __slots__ = ("profiler", "name", "parent", "span", "started", "memory")
+
+    def __init__(self, profiler, name, parent):
+        self.profiler = profiler
+        self.name = name
+        self.parent = parent
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        parent = self.parent or (stack[-1] if stack else self.profiler.root)
+        self.span = parent.child(self.name)
+        stack.append(self.span)
+        self.memory = self.profiler._traced()
+        self.started = perf_counter()
+        return self.span
+
+    def __exit__(self, *exc):
+        elapsed = perf_counter() - self.started
+        span = self.span
+        span.seconds += elapsed
+        span.calls += 1
+        span.allocated += self.profiler._traced() - self.memory
+        self.profiler._stack().pop()
+        return False
+
+
+class _NoSpan:
+    """The span handed out while profiling is off: entering and leaving it does nothing"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Profiler:
+    """Records nested timing spans (and optionally allocations) of search and design-system runs"""
+
+    def __init__(self, allocations=False):
+        self.allocations = allocations
+        self.root = Span("total")
+        self.top_allocations = []
+        self._stacks = {}  # thread id -> open spans
+        self._previous = None
+        self._tracemalloc = None
+
+    def __enter__(self):
+        global _PROFILER
+        if self.allocations:
+            import tracemalloc
+
+            self._tracemalloc = tracemalloc
+            tracemalloc.start()
+        self._previous = _PROFILER
+        _PROFILER = self
+        self._started = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        global _PROFILER
+        self.root.seconds += perf_counter() - self._started
+        self.root.calls += 1
+        _PROFILER = self._previous
+        if self._tracemalloc:
+            snapshot = self._tracemalloc.take_snapshot()
+            self._tracemalloc.stop()
+            self.top_allocations = [(str(stat.traceback), stat.count, stat.size)
+                                    for stat in snapshot.statistics("lineno")[:10]]
+        return False
+
+    def _stack(self):
+        ident = get_ident()
+        stack = self._stacks.get(ident)
+        if stack is None:
+            stack = self._stacks[ident] = []
+        return stack
+
+    def _traced(self):
+        return self._tracemalloc.get_traced_memory()[0] if self._tracemalloc else 0
+
+    def span(self, name, parent=None):
+        return _OpenSpan(self, name, parent)
+
+    def current(self):
+        """Innermost span open in this thread (the root when none is)"""
+        stack = self._stack()
+        return stack[-1] if stack else self.root
+
+    def record(self, name, seconds):
+        """Add a stage timed before the profiler started (e.g. module imports) to the total"""
+        span = self.root.child(name)
+        span.seconds += seconds
+        span.calls += 1
+        self.root.seconds += seconds
+
+    def as_dict(self):
+        report = self.root.as_dict(self.allocations)
+        if self.allocations:
+            report["top_allocations"] = [{"site": site, "blocks": count, "kib": size / 1024}
+                                         for site, count, size in self.top_allocations]
+        return report
+
+    def report(self, fmt="tree"):
+        """The recorded spans as a text tree or, with fmt="json", a JSON document"""
+        if fmt == "json":
+            import json
+
+            return json.dumps(self.as_dict(), indent=2, ensure_ascii=False)
+        return self.format_tree()
+
+    def format_tree(self):
+        """Human-readable span tree, children in the order first entered"""
+        lines = []
+
+        def walk(span, depth):
+            line = f"{'  ' * depth}{span.name:<{max(1, 36 - 2 * depth)}} {span.seconds * 1000:>10.3f} ms  x{span.calls}"
+            if self.allocations:
+                line += f"  {span.allocated / 1024:>+10.1f} KiB"
+            lines.append(line)
+            for child in span.children.values():
+                walk(child, depth + 1)
+
+        walk(self.root, 0)
+        if self.allocations:
+            lines.append("")
+            lines.append("Top allocation sites (live blocks at exit):")
+            for site, count, size in self.top_allocations:
+                lines.append(f"  {site}: {count} blocks, {size / 1024:.1f} KiB")
+        return "\n".join(lines)
+
+
+_PROFILER = None  # The active Profiler, if any
+
+
+def span(name, parent=None):
+    """Context manager timing a stage under the active profiler; a shared no-op when none is active"""
+    profiler = _PROFILER
+    if profiler is None:
+        return _NO_SPAN
+    return profiler.span(name, parent)
+
+
+def current_span():
+    """The calling thread's innermost open span, to parent work run on other threads (None when off)"""
+    profiler = _PROFILER
+    return None if profiler is None else profiler.current()
+
+
+# ============ ANALYZERS ============
+# Regex sources are compiled (and cached by re) on first use: plain ASCII searches never need them
+_CJK_PATTERN = '([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af]+)'
+
+
+class _NormalizeTable(dict):
+    """str.translate table mapping punctuation and symbols to a space and fullwidth ASCII to ASCII"""
+
+    def __init__(self):
+        super().__init__()
+        for code in range(128):
+            self[code]
+
+    def __missing__(self, code):
+        char = chr(code)
+        if 0xFF01 <= code <= 0xFF5E:  # Fullwidth forms typed by CJK input methods
+            char = chr(code - 0xFEE0).lower()
+        value = ord(char) if char.isalnum() or char == "_" or char.isspace() else 32
+        self[code] = value
+        return value
+
+
+_NORMALIZE = _NormalizeTable()
+
+
+def _light_stem(word):
+    """Strip plural endings: policies -> policy, buttons -> button (not class, status, axis)"""
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")) and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+class Analyzer:
+    """Text -> tokens pipeline: lowercase, normalise, split, CJK bigrams, filter, optional stemming"""
+
+    QUERY_CACHE_SIZE = 4096  # Memoised query analyses before the memo is reset
+
+    def __init__(self, min_length=3, cjk_bigrams=True, stem=False):
+        self.min_length = min_length
+        self.cjk_bigrams = cjk_bigrams
+        self.stem = stem
+        self.options = (min_length, cjk_bigrams, stem)
+        self._queries = {}
+
+    def __eq__(self, other):
+        return isinstance(other, Analyzer) and self.options == other.options
+
+    def __hash__(self):
+        return hash(self.options)
+
+    def __reduce__(self):
+        return get_analyzer, self.options
+
+    def _words(self, word):
+        if word.isascii() or not self.cjk_bigrams:
+            return (word,)
+        # Alternating non-CJK / CJK pieces; a CJK run becomes its bigrams (a lone character stays)
+        pieces = []
+        for pos, piece in enumerate(re.split(_CJK_PATTERN, word)):
+            if pos % 2 == 0:
+                if piece:
+                    pieces.append(piece)
+            elif len(piece) == 1:
+                pieces.append((piece,))
+            else:
+                pieces.extend((piece[i:i + 2],) for i in range(len(piece) - 1))
+        return pieces
+
+    def analyze(self, text):
+        """Tokens of a text, in order"""
+        tokens = []
+        for word in str(text).lower().translate(_NORMALIZE).split():
+            for piece in self._words(word):
+                if isinstance(piece, tuple):  # CJK gram, kept whatever its length
+                    tokens.append(sys.intern(piece[0]))
+                elif len(piece) >= self.min_length:
+                    tokens.append(sys.intern(_light_stem(piece) if self.stem else piece))
+        return tokens
+
+    def query(self, text):
+        """Memoised analyze() for query strings, as a tuple"""
+        tokens = self._queries.get(text)
+        if tokens is None:
+            if len(self._queries) >= self.QUERY_CACHE_SIZE:
+                self._queries.clear()
+            tokens = self._queries[text] = tuple(self.analyze(text))
+        return tokens
+
+
+_ANALYZERS = {}
+
+
+def get_analyzer(min_length=3, cjk_bigrams=True, stem=False):
+    """The shared Analyzer for these options, so equal configs share one query memo"""
+    options = (min_length, cjk_bigrams, stem)
+    analyzer = _ANALYZERS.get(options)
+    if analyzer is None:
+        analyzer = _ANALYZERS[options] = Analyzer(*options)
+    return analyzer
+
+
+DEFAULT_ANALYZER = get_analyzer()
+
+
+# ============ FUZZY LOOKUP ============
+def _deletes(word, edits):
+    """Every string left by deleting up to edits characters from word, word included"""
+    found = {word}
+    layer = found
+    for _ in range(edits):
+        layer = {part[:pos] + part[pos + 1:] for part in layer if len(part) > 1 for pos in range(len(part))}
+        found |= layer
+    return found
+
+
+def _edit_distance(a, b, limit):
+    """Optimal string alignment distance (adjacent transpositions count once), or limit + 1 past limit"""
+    # Common prefix and suffix never change the distance
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a = a[start:len(a) - end]
+    b = b[start:len(b) - end]
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    before = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                distance = min(distance, before[j - 2] + 1)
+            current[j] = distance
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+class _PackedStrings:
+    """Strings packed back to back as UTF-8 (blob) with len + 1 end offsets; pickles as two buffers"""
+
+    __slots__ = ("offsets", "blob")
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def pack(cls, values):
+        blob = bytearray()
+        offsets = array("I", [0])
+        for value in values:
+            blob += value.encode("utf-8")
+            offsets.append(len(blob))
+        return cls(offsets, bytes(blob))
+
+    def __getstate__(self):
+        return self.offsets, self.blob
+
+    def __setstate__(self, state):
+        self.offsets, self.blob = state
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        return str(self.blob[self.offsets[idx]:self.offsets[idx + 1]], "utf-8")
+
+    def raw(self, idx):
+        return bytes(self.blob[self.offsets[idx]:self.offsets[idx + 1]])
+
+    def find(self, value):
+        """Position of value when the strings are sorted (UTF-8 byte order is code point order), else -1"""
+        key = value.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.raw(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self) and self.raw(lo) == key else -1
+
+
+class Lexicon:
+    """Typo-tolerant and prefix lookup over an index's vocabulary (SymSpell symmetric deletes)"""
+
+    MAX_EDITS = 2
+    PREFIX_LENGTH = 7  # Characters of each term filed under its deletes
+    MIN_PREFIX = 3  # Shortest token expanded to the terms it starts
+    MAX_EXPANSIONS = 3  # Terms a prefix expands to, most frequent first
+    MAX_PREFIX_SCAN = 64  # Terms starting with a prefix considered for expansion
+
+    def __init__(self, frequencies):
+        """frequencies maps each term to its document frequency, which ranks expansions and corrections"""
+        terms = sorted(frequencies)
+        by_delete = defaultdict(list)
+        # A misspelling within MAX_EDITS of a term shares one of its deletes, so a correction
+        # probes a few dozen deletes whatever the vocabulary size
+        for pos, term in enumerate(terms):
+            for key in _deletes(term[:self.PREFIX_LENGTH], self.MAX_EDITS):
+                by_delete[key].append(pos)
+        deletes = sorted(by_delete)
+        delete_offsets = array("I", [0])
+        delete_terms = array("I")
+        for key in deletes:
+            delete_terms.extend(by_delete[key])
+            delete_offsets.append(len(delete_terms))
+        self._tables(_PackedStrings.pack(terms), array("I", [frequencies[term] for term in terms]),
+                     _PackedStrings.pack(deletes), delete_offsets, delete_terms)
+
+    @classmethod
+    def from_tables(cls, terms, counts, deletes, delete_offsets, delete_terms):
+        """A lexicon over tables laid out as __init__ builds them (e.g. sections of a snapshot)"""
+        lexicon = cls.__new__(cls)
+        lexicon._tables(terms, counts, deletes, delete_offsets, delete_terms)
+        return lexicon
+
+    def _tables(self, terms, counts, deletes, delete_offsets, delete_terms):
+        # Sorted terms with their frequencies, and sorted deletes with the positions of their terms,
+        # all flat buffers searched in place: a stored lexicon needs no decoding before its first lookup
+        self.terms = terms
+        self.counts = counts
+        self.deletes = deletes
+        self.delete_offsets = delete_offsets
+        self.delete_terms = delete_terms
+        self._lookups = {}
+
+    def __getstate__(self):
+        return self.terms, self.counts, self.deletes, self.delete_offsets, self.delete_terms
+
+    def __setstate__(self, state):
+        self._tables(*state)
+
+    @staticmethod
+    def max_edits(length):
+        """Edits tolerated in a token of this length: none below 4 characters, 2 from 8"""
+        return 0 if length < 4 else 1 if length < 8 else 2
+
+    def _rank(self, pos, term):
+        return -self.counts[pos], len(term), term
+
+    def lookup(self, token):
+        """Terms to search for a token (memoised): itself, the terms it starts or its closest correction"""
+        terms = self._lookups.get(token)
+        if terms is None:
+            if len(self._lookups) >= Analyzer.QUERY_CACHE_SIZE:
+                self._lookups.clear()
+            if self.terms.find(token) >= 0:
+                terms = (token,)
+            else:
+                terms = self.expand(token) or self.correct(token)
+            self._lookups[token] = terms
+        return terms
+
+    def expand(self, prefix):
+        """The most frequent terms starting with prefix"""
+        if len(prefix) < self.MIN_PREFIX:
+            return ()
+        start = bisect_left(self.terms, prefix)
+        matches = []
+        for pos in range(start, min(start + self.MAX_PREFIX_SCAN, len(self.terms))):
+            term = self.terms[pos]
+            if not term.startswith(prefix):
+                break
+            matches.append(self._rank(pos, term))
+        return tuple(term for _, _, term in sorted(matches)[:self.MAX_EXPANSIONS])
+
+    def correct(self, token):
+        """The closest term within max_edits(len(token)) edits, most frequent on ties"""
+        limit = min(self.max_edits(len(token)), self.MAX_EDITS)
+        best = None
+        seen = set()
+        for key in _deletes(token[:self.PREFIX_LENGTH], limit):
+            idx = self.deletes.find(key)
+            if idx < 0:
+                continue
+            for pos in self.delete_terms[self.delete_offsets[idx]:self.delete_offsets[idx + 1]]:
+                if pos in seen:
+                    continue
+                seen.add(pos)
+                term = self.terms[pos]
+                if abs(len(term) - len(token)) > limit:
+                    continue
+                distance = _edit_distance(token, term, limit)
+                if distance <= limit:
+                    rank = (distance, self._rank(pos, term))
+                    if best is None or rank < best:
+                        best = rank
+        return () if best is None else (best[1][2],)
+
+
 # ============ BM25 IMPLEMENTATION ============
+_SCORE_EPS = 1e-9  # Slack for float rounding when pruning against upper bounds
+_QUOTES = '"\u201c\u201d'
+_PHRASE_PATTERN = '["\u201c\u201d]([^"\u201c\u201d]*)["\u201c\u201d]'  # "quoted phrase", straight or curly
+
+
+def _concat(arrays, typecode):
+    """(offsets, values): the arrays back to back in one array, and where each starts and the last ends"""
+    offsets = array("Q", [0])
+    values = array(typecode)
+    for part in arrays:
+        values.extend(part if part.typecode == typecode else part.tolist())
+        offsets.append(len(values))
+    return offsets, values
+
+
+def _split(packed):
+    """The arrays of a _concat() result"""
+    offsets, values = packed
+    return [values[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+def _widest(arrays, typecode):
+    """typecode, or array('I') when any of the arrays was widened to it"""
+    return "I" if any(part.typecode == "I" for part in arrays) else typecode
+
+
+class _PostingLists:
+    """Postings of a BM25 index by term id, with BM25F field counts and positions, in flat buffers"""
+
+    def __init__(self, tf_code="H", stride=0):
+        self.stride = stride
+        self.offsets = array("Q", [0])
+        self.docs = array("I")
+        self.tfs = array(tf_code)
+        self.fields = array("H")
+        self.pos_starts = array("Q", [0])  # Per posting, where its positions start in pos_values
+        self.pos_values = array("I")
+        # tid -> (doc ids, tfs, field counts, position starts, positions) of terms changed since compact()
+        self.changed = {}
+        self._count = 0
+        self._views()
+
+    def _views(self):
+        self._docs = memoryview(self.docs)
+        self._tfs = memoryview(self.tfs)
+        self._fields = memoryview(self.fields)
+        self._pos_values = memoryview(self.pos_values)
+
+    def __getstate__(self):
+        self.compact()
+        return self.stride, self.offsets, self.docs, self.tfs, self.fields, self.pos_starts, self.pos_values
+
+    def __setstate__(self, state):
+        self.stride, self.offsets, self.docs, self.tfs, self.fields, self.pos_starts, self.pos_values = state
+        self.changed = {}
+        self._count = len(self.offsets) - 1
+        self._views()
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, tid):
+        entry = self.changed.get(tid)
+        if entry is not None:
+            return entry[0], entry[1]
+        start, end = self.offsets[tid], self.offsets[tid + 1]
+        return self._docs[start:end], self._tfs[start:end]
+
+    def __iter__(self):
+        return (self[tid] for tid in range(self._count))
+
+    def field_counts(self, tid):
+        """A term's field counts, stride per posting"""
+        entry = self.changed.get(tid)
+        if entry is not None:
+            return entry[2]
+        return self._fields[self.offsets[tid] * self.stride:self.offsets[tid + 1] * self.stride]
+
+    def positions(self, tid, pos):
+        """Ascending positions of a term in the document of its pos-th posting"""
+        entry = self.changed.get(tid)
+        if entry is not None:
+            starts = entry[3]
+            return entry[4][starts[pos]:starts[pos + 1]]
+        posting = self.offsets[tid] + pos
+        return self._pos_values[self.pos_starts[posting]:self.pos_starts[posting + 1]]
+
+    def append(self):
+        """Add an empty term; returns its id"""
+        self.changed[self._count] = (array("I"), array(self.tfs.typecode), array(self.fields.typecode),
+                                     array("I", [0]), array("I"))
+        self._count += 1
+        return self._count - 1
+
+    def _unpack(self, tid):
+        """Copies of a packed term's arrays, with position starts relative to the term"""
+        start, end = self.offsets[tid], self.offsets[tid + 1]
+        first = self.pos_starts[start]
+        return (self.docs[start:end], self.tfs[start:end], self.fields[start * self.stride:end * self.stride],
+                array("I", [offset - first for offset in self.pos_starts[start:end + 1]]),
+                self.pos_values[first:self.pos_starts[end]])
+
+    def _mutable(self, tid):
+        entry = self.changed.get(tid)
+        if entry is None:
+            entry = self.changed[tid] = self._unpack(tid)
+        return entry
+
+    def insert(self, tid, doc, tf, field_counts=(), positions=()):
+        """Add a document's posting; counts past 65535 widen the term's array('H') to array('I')"""
+        doc_ids, tfs, fields, starts, values = self._mutable(tid)
+        pos = bisect_left(doc_ids, doc)
+        doc_ids.insert(pos, doc)
+        try:
+            tfs.insert(pos, tf)
+        except OverflowError:
+            tfs = array("I", tfs)
+            tfs.insert(pos, tf)
+            self.changed[tid] = (doc_ids, tfs, fields, starts, values)
+        stride = self.stride
+        if stride:
+            try:
+                fields[pos * stride:pos * stride] = array(fields.typecode, field_counts)
+            except OverflowError:
+                fields = array("I", fields)
+                fields[pos * stride:pos * stride] = array("I", field_counts)
+                self.changed[tid] = (doc_ids, tfs, fields, starts, values)
+        if pos == len(doc_ids) - 1:  # Appended, as every posting is while fitting
+            values.extend(positions)
+            starts.append(len(values))
+            return
+        values[starts[pos]:starts[pos]] = array("I", positions)
+        starts.insert(pos, starts[pos])
+        for later in range(pos + 1, len(starts)):
+            starts[later] += len(positions)
+
+    def delete(self, tid, doc):
+        """Remove a document's posting"""
+        doc_ids, tfs, fields, starts, values = self._mutable(tid)
+        pos = bisect_left(doc_ids, doc)
+        del doc_ids[pos], tfs[pos]
+        del fields[pos * self.stride:(pos + 1) * self.stride]
+        count = starts[pos + 1] - starts[pos]
+        del values[starts[pos]:starts[pos + 1]], starts[pos]
+        for later in range(pos, len(starts)):
+            starts[later] -= count
+
+    def compact(self):
+        """Pack the changed terms back into the flat arrays"""
+        if not self.changed:
+            return
+        entries = self.changed.values()
+        tf_code = _widest([self.tfs] + [entry[1] for entry in entries], self.tfs.typecode)
+        field_code = _widest([self.fields] + [entry[2] for entry in entries], "H")
+        offsets = array("Q", [0])
+        docs = array("I")
+        tfs = array(tf_code)
+        fields = array(field_code)
+        pos_starts = array("Q")
+        pos_values = array("I")
+        for tid in range(self._count):
+            entry = self.changed.get(tid) or self._unpack(tid)
+            for values, part in zip((docs, tfs, fields), entry):
+                values.extend(part if part.typecode == values.typecode else part.tolist())
+            offsets.append(len(docs))
+            first = len(pos_values)
+            pos_starts.extend([first + offset for offset in entry[3][:-1]])
+            pos_values.extend(entry[4])
+        pos_starts.append(len(pos_values))
+        self.offsets, self.docs, self.tfs, self.fields = offsets, docs, tfs, fields
+        self.pos_starts, self.pos_values = pos_starts, pos_values
+        self.changed = {}
+        self._views()
+
+
+class _ImpactLists:
+    """Precomputed BM25 contribution of every posting, in document order and by descending weight"""
+
+    def __init__(self, offsets, weights, ranked_docs, ranked_weights):
+        self.offsets = offsets
+        self.weights = weights
+        self.ranked_docs = ranked_docs
+        self.ranked_weights = ranked_weights
+        self._weights = memoryview(weights)
+        self._ranked_docs = memoryview(ranked_docs)
+        self._ranked_weights = memoryview(ranked_weights)
+
+    def __getstate__(self):
+        return self.offsets, self.weights, self.ranked_docs, self.ranked_weights
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    @classmethod
+    def build(cls, bm25):
+        bm25.refresh()
+        offsets = array("Q", [0])
+        weights = array("d")
+        ranked_docs = array("I")
+        ranked_weights = array("d")
+        k1_plus = bm25.k1 + 1
+        doc_norms = bm25.doc_norms
+        for tid, (doc_ids, tfs) in enumerate(bm25.postings):
+            idf = bm25.idf[tid]
+            term_weights = [idf * (tf * k1_plus) / (tf + doc_norms[idx]) for idx, tf in zip(doc_ids, tfs)]
+            weights.extend(term_weights)
+            # Stable sort: equal weights stay in document order
+            order = sorted(range(len(term_weights)), key=term_weights.__getitem__, reverse=True)
+            ranked_docs.extend([doc_ids[pos] for pos in order])
+            ranked_weights.extend([term_weights[pos] for pos in order])
+            offsets.append(len(weights))
+        return cls(offsets, weights, ranked_docs, ranked_weights)
+
+    def __getitem__(self, tid):
+        """A term's weights in document order"""
+        return self._weights[self.offsets[tid]:self.offsets[tid + 1]]
+
+    def ranked(self, tid):
+        """A term's (document ids, weights) by descending weight"""
+        start, end = self.offsets[tid], self.offsets[tid + 1]
+        return self._ranked_docs[start:end], self._ranked_weights[start:end]
+
+
 class BM25:
     """BM25 ranking algorithm for text search"""
 
-    def __init__(self, k1=1.5, b=0.75):
+    FIELD_GAP = 8  # Positions skipped between fields, so phrases and proximity never span two fields
+    PROXIMITY_WINDOW = 4  # Farthest apart (in positions) two query terms still earn a proximity boost
+    PROXIMITY_WEIGHT = 0.3  # Boost of two adjacent query terms, as a fraction of the rarer one's idf
+    RERANK_POOL = 16  # BM25 hits reranked by proximity for queries without phrases
+
+    # Impact-ordered mode (fit(..., impacts=True)): postings' BM25 contributions are precomputed
+    # (see _ImpactLists), so scoring sums stored floats, and top_k() walks each query term's
+    # postings best weight first, stopping once no unseen document can enter the top k.
+
+    def __init__(self, k1=1.5, b=0.75, analyzer=None):
         self.k1 = k1
         self.b = b
+        self.analyzer = analyzer or DEFAULT_ANALYZER
+        self.vocab = {}
+        self.terms = []
         self.corpus = []
-        self.doc_lengths = []
+        self.doc_lengths = array("I")
+        self.doc_norms = array("d")
         self.avgdl = 0
-        self.idf = {}
-        self.doc_freqs = defaultdict(int)
+        self.idf = array("d")
+        self.doc_freqs = array("I")
+        self.postings = _PostingLists()
+        self.max_scores = array("d")
+        self.doc_groups = []
+        self.doc_keys = []
+        self.field_weights = None
+        self.field_lengths = []
         self.N = 0
+        self._stride = 1  # Field counts stored per BM25F posting
+        self._length_totals = defaultdict(int)
+        self._group_counts = defaultdict(int)
+        self._avg_lengths = {}
+        self._version = 0
+        self._term_versions = array("Q")
+        self._sparse = None
+        self._lexicon = None
+        self.known_terms = None  # Optional callable: terms spelled correctly though this index lacks them
+        self.impact_ordered = False
+        self._impacts = None
+
+    def __getstate__(self):
+        self.refresh()
+        if self.impact_ordered:
+            self.impacts()  # Stored with the index, so loading it costs no rebuild
+        state = self.__dict__.copy()
+        state["_sparse"] = None  # NumPy arrays are rebuilt on demand, NumPy may be absent on load
+        state["_lexicon"] = self.lexicon()  # Stored with the index: flat buffers, ready without a rebuild
+        state["known_terms"] = None
+        state["corpus"] = _concat(self.corpus, "I")  # Pickled back to back, as one flat buffer
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.corpus = _split(state["corpus"])
+        self._sparse = None
+        self.known_terms = None
 
     def tokenize(self, text):
-        """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        return [w for w in text.split() if len(w) > 2]
+        """Query tokens from the index's analyzer (memoised), corrected with FUZZY_QUERIES"""
+        with span("tokenize"):
+            tokens = self.analyzer.query(text)
+            if FUZZY_QUERIES and self.N and any(self.term_id(token) is None for token in tokens):
+                tokens = tuple(term for terms in self._lookup(tokens) for term in terms)
+            return tokens
+
+    def _lookup(self, tokens):
+        """Per token, the terms tokenize() searches for it"""
+        known = self.known_terms() if self.known_terms else ()
+        terms = []
+        for token in tokens:
+            if self.term_id(token) is not None or token in known:
+                terms.append((token,))
+            else:
+                terms.append(self.lexicon().lookup(token) or (token,))
+        return terms
+
+    def phrases(self, query):
+        """Term tuples of the query's quoted phrases"""
+        phrases = []
+        if not any(quote in query for quote in _QUOTES):
+            return ()
+        for text in re.findall(_PHRASE_PATTERN, query):
+            tokens = self.analyzer.query(text)
+            if FUZZY_QUERIES and self.N and any(self.term_id(token) is None for token in tokens):
+                tokens = tuple(terms[0] for terms in self._lookup(tokens))
+            if tokens:
+                phrases.append(tokens)
+        return tuple(phrases)
+
+    def lexicon(self):
+        """Lexicon over the indexed terms, built by fit() and stored with the index; updates drop it"""
+        if self._lexicon is None:
+            self._lexicon = Lexicon({term: self.doc_freqs[tid] for term, tid in self.vocab.items() if self.doc_freqs[tid]})
+        return self._lexicon
+
+    def term_id(self, term):
+        """Id of a term occurring in at least one document, else None"""
+        tid = self.vocab.get(term)
+        if tid is None or not self.doc_freqs[tid]:
+            return None
+        return tid
+
+    def indexed_terms(self):
+        """Every term occurring in at least one document"""
+        return (term for term, tid in self.vocab.items() if self.doc_freqs[tid])
+
+    def fit(self, documents, groups=None, field_weights=None, keys=None, impacts=False):
+        """Build BM25 index and inverted postings from documents"""
+        if field_weights is not None and not isinstance(field_weights, dict):
+            field_weights = tuple(field_weights)
+        with span("fit"):
+            self.__init__(self.k1, self.b, self.analyzer)
+            self.field_weights = field_weights
+            # BM25F: per-field tfs are length-normalised and weighted into the postings at fit time;
+            # a dict maps each group id to the weights of its own fields
+            if isinstance(field_weights, dict):
+                self._stride = max((len(weights) for weights in field_weights.values()), default=1)
+            elif field_weights is not None:
+                self._stride = len(field_weights)
+            if field_weights is not None:
+                self.postings = _PostingLists("d", self._stride)
+            # groups normalise lengths per group and can filter top_k(); keys stay aligned with ids
+            self.splice(0, 0, documents, groups, keys)
+            self.postings.compact()
+            self.refresh()
+            self.impact_ordered = impacts
+            if impacts:
+                self.impacts()
+            self.lexicon()
+
+    # ---- Incremental updates ----
+    def add(self, document, group=None, key=None):
+        """Append a document; returns its id"""
+        self.splice(self.N, self.N, [document], None if group is None else [group], None if key is None else [key])
+        return self.N - 1
+
+    def remove(self, idx):
+        """Remove a document; later ids shift down by one"""
+        self.splice(idx, idx + 1, [])
+
+    def replace(self, idx, document, group=None, key=None):
+        """Replace a document in place, keeping its id"""
+        self.splice(idx, idx + 1, [document], None if group is None else [group], None if key is None else [key])
+
+    def splice(self, start, stop, documents, groups=None, keys=None):
+        """Replace documents start..stop-1 with documents, like list slice assignment"""
+        self.update([(start, stop, documents, groups, keys)])
+
+    def update(self, edits):
+        """Apply splices (start, stop, documents[, groups[, keys]]) in current ids, ascending, in one pass"""
+        # Scores match refitting the edited corpus: idf, BM25F frequencies and max_scores are
+        # refreshed per term on its next query, and term ids are never reused
+        edits = [(start, stop, documents, *rest, None, None)[:5] for start, stop, documents, *rest in edits]
+        analysed = []
+        with span("tokenize"):
+            for _, _, documents, _, _ in edits:
+                if self.field_weights is None:
+                    docs = [[self.analyzer.analyze(doc)] for doc in documents]
+                else:
+                    docs = [[self.analyzer.analyze(text) for text in doc] for doc in documents]
+                analysed.append([[array("I", map(self._add_term, field)) for field in doc] for doc in docs])
 
-    def fit(self, documents):
-        """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
+        for start, stop, _, _, _ in edits:
+            for idx in range(start, stop):
+                self._detach(idx)
+
+        # Renumber the surviving documents after the first change in length
+        mapping = []
+        shift = 0
+        first = None
+        for (start, stop, _, _, _), docs in zip(edits, analysed):
+            if shift:
+                mapping.extend(range(len(mapping) + shift, start + shift))
+            else:
+                mapping.extend(range(len(mapping), start))
+            mapping.extend([None] * (stop - start))
+            shift += len(docs) - (stop - start)
+            if shift and first is None:
+                first = stop
+        if first is not None:
+            mapping.extend(range(len(mapping) + shift, self.N + shift))
+            for doc_ids, _ in self.postings:
+                for pos in range(bisect_left(doc_ids, first), len(doc_ids)):
+                    doc_ids[pos] = mapping[doc_ids[pos]]
+
+        # Back to front, so each slice is still addressed in current ids
+        for (start, stop, _, groups, keys), docs in reversed(list(zip(edits, analysed))):
+            self.corpus[start:stop] = [array("I", [tid for field in doc for tid in field]) for doc in docs]
+            self.doc_lengths[start:stop] = array("I", [sum(len(field) for field in doc) for doc in docs])
+            if self.field_weights is not None:
+                self.field_lengths[start:stop] = [tuple(len(field) for field in doc) for doc in docs]
+            if groups is not None or self.doc_groups:
+                self.doc_groups[start:stop] = [] if groups is None else groups
+            if keys is not None or self.doc_keys:
+                self.doc_keys[start:stop] = [] if keys is None else keys
         self.N = len(self.corpus)
-        if self.N == 0:
-            return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
-        self.avgdl = sum(self.doc_lengths) / self.N
 
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
+        shift = 0
+        for (start, stop, _, _, _), docs in zip(edits, analysed):
+            for idx, doc in enumerate(docs, start + shift):
+                self._attach(idx, doc)
+            shift += len(docs) - (stop - start)
+
+        self._version += 1
+        self._sparse = None
+        self._lexicon = None
+        self._impacts = None
+        self._refresh_norms()
+
+    def _add_term(self, term):
+        """Id of a term, assigning the next id (and empty per-term slots) to a new one"""
+        tid = self.vocab.get(term)
+        if tid is None:
+            tid = self.vocab[term] = len(self.terms)
+            self.terms.append(term)
+            self.postings.append()
+            self.doc_freqs.append(0)
+            self.idf.append(0.0)
+            self.max_scores.append(0.0)
+            self._term_versions.append(0)
+        return tid
+
+    def _group(self, idx):
+        return self.doc_groups[idx] if self.doc_groups else None
+
+    def _detach(self, idx):
+        """Drop a document's postings and length statistics"""
+        group = self._group(idx)
+        self._group_counts[group] -= 1
+        lengths = self.field_lengths[idx] if self.field_weights is not None else (self.doc_lengths[idx],)
+        for pos, length in enumerate(lengths):
+            self._length_totals[group, pos] -= length
+
+        for tid in set(self.corpus[idx]):
+            self.postings.delete(tid, idx)
+            self.doc_freqs[tid] -= 1
+
+    def _attach(self, idx, fields):
+        """Add an analysed document's postings and length statistics"""
+        group = self._group(idx)
+        self._group_counts[group] += 1
+        for pos, field in enumerate(fields):
+            self._length_totals[group, pos] += len(field)
+
+        # Postings per term: parallel arrays of document ids and term frequencies (per field for BM25F),
+        # and the term's positions, numbered across fields with FIELD_GAP between them
+        stride = self._stride
+        counts = {}
+        positions = {}
+        start = 0
+        for pos, field in enumerate(fields):
+            for place, tid in enumerate(field, start):
+                field_counts = counts.get(tid)
+                if field_counts is None:
+                    field_counts = counts[tid] = [0] * stride
+                    positions[tid] = []
+                field_counts[pos] += 1
+                positions[tid].append(place)
+            start += len(field) + self.FIELD_GAP
+        for tid, field_counts in counts.items():
+            if self.field_weights is None:
+                self.postings.insert(tid, idx, field_counts[0], (), positions[tid])
+            else:
+                # Weighted frequency, filled in by _refresh_term
+                self.postings.insert(tid, idx, 0, field_counts, positions[tid])
+            self.doc_freqs[tid] += 1
 
-        for word, freq in self.doc_freqs.items():
-            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+    def _refresh_norms(self):
+        """Recompute average field lengths and per-document length norms"""
+        self._avg_lengths = {key: (total / self._group_counts[key[0]]) or 1
+                             for key, total in self._length_totals.items() if self._group_counts[key[0]]}
+        self.avgdl = sum(self.doc_lengths) / self.N if self.N else 0
+        if self.field_weights is None:
+            self.doc_norms = array("d", [self.k1 * self._length_norm(self._group(idx), 0, doc_len)
+                                         for idx, doc_len in enumerate(self.doc_lengths)])
+        else:
+            self.doc_norms = array("d", [self.k1]) * self.N  # Length normalisation is folded into the field frequencies
+
+    def _length_norm(self, group, pos, length):
+        return 1 - self.b + self.b * length / self._avg_lengths[group, pos]
+
+    def _refresh_term(self, tid):
+        """Recompute a term's idf, BM25F frequencies and score upper bound"""
+        doc_ids, tfs = self.postings[tid]
+        freq = len(doc_ids)
+        idf = self.idf[tid] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+
+        if self.field_weights is not None:
+            stride = self._stride
+            field_tfs = self.postings.field_counts(tid)
+            for pos, idx in enumerate(doc_ids):
+                group = self._group(idx)
+                weights = self.field_weights.get(group) if isinstance(self.field_weights, dict) else self.field_weights
+                lengths = self.field_lengths[idx]
+                tf = 0
+                for field, count in enumerate(field_tfs[pos * stride:pos * stride + len(lengths)]):
+                    if count:
+                        tf += count * weights[field] / self._length_norm(group, field, lengths[field])
+                tfs[pos] = tf
+
+        # Upper bound of the term's contribution, used to prune top-k search
+        k1_plus = self.k1 + 1
+        self.max_scores[tid] = max(idf * (tf * k1_plus) / (tf + self.doc_norms[idx]) for idx, tf in zip(doc_ids, tfs))
+        self._term_versions[tid] = self._version
+
+    def _fresh(self, tid):
+        """Bring a term's derived statistics up to date after updates"""
+        if self._version and self._term_versions[tid] != self._version:
+            self._refresh_term(tid)
+
+    def refresh(self):
+        """Bring every term's derived statistics up to date"""
+        if self._version:
+            for tid, freq in enumerate(self.doc_freqs):
+                if freq:
+                    self._fresh(tid)
 
     def score(self, query):
-        """Score all documents against query"""
+        """Score all documents against query, visiting only matching postings"""
         query_tokens = self.tokenize(query)
+        scores = [0] * self.N
+        k1_plus = self.k1 + 1
+
+        with span("score"):
+            for token in query_tokens:
+                tid = self.term_id(token)
+                if tid is None:
+                    continue
+                if self.impact_ordered:
+                    for idx, weight in zip(self.postings[tid][0], self.impacts()[tid]):
+                        scores[idx] += weight
+                    continue
+                self._fresh(tid)
+                idf = self.idf[tid]
+                doc_ids, tfs = self.postings[tid]
+                for idx, tf in zip(doc_ids, tfs):
+                    scores[idx] += idf * (tf * k1_plus) / (tf + self.doc_norms[idx])
+
+        with span("top_k"):
+            return sorted(enumerate(scores), key=lambda x: x[1], reverse=True)
+
+    def top_k(self, query, k=MAX_RESULTS, groups=None):
+        """Return the k best (idx, score) pairs with score > 0, best first, using MaxScore"""
+        # Same ranking as score()[:k]; heap selection is interleaved with scoring, so the
+        # "top_k" span covers only the final ordering
+        query_ids = [self.term_id(token) for token in self.tokenize(query)]
+        weights = {}
+        for tid in query_ids:
+            if tid is not None:
+                self._fresh(tid)
+                weights[tid] = weights.get(tid, 0) + 1
+        if k <= 0 or not weights:
+            return []
+        if self.impact_ordered:
+            return self._top_k_impacts(query_ids, weights, k, groups)
+
+        with span("score"):
+            terms = sorted(weights, key=lambda t: weights[t] * self.max_scores[t])
+            postings = [self.postings[term] for term in terms]
+            bounds = []  # bounds[i]: best possible score from terms[:i + 1]
+            total = 0
+            for term in terms:
+                total += weights[term] * self.max_scores[term]
+                bounds.append(total)
+
+            k1_plus = self.k1 + 1
+            doc_norms = self.doc_norms
+            cursors = [0] * len(terms)
+            heap = []
+            threshold = 0
+            essential = 0  # terms[essential:] may still introduce new candidates
+
+            while essential < len(terms):
+                heads = [postings[i][0][cursors[i]] for i in range(essential, len(terms)) if cursors[i] < len(postings[i][0])]
+                if not heads:
+                    break
+                doc = min(heads)
+                if groups is not None and self.doc_groups[doc] not in groups:
+                    for i in range(essential, len(terms)):
+                        doc_ids = postings[i][0]
+                        if cursors[i] < len(doc_ids) and doc_ids[cursors[i]] == doc:
+                            cursors[i] += 1
+                    continue
+
+                contributions = {}
+                partial = 0
+
+                for i in range(essential, len(terms)):
+                    doc_ids, tfs = postings[i]
+                    pos = cursors[i]
+                    if pos < len(doc_ids) and doc_ids[pos] == doc:
+                        tf = tfs[pos]
+                        value = self.idf[terms[i]] * (tf * k1_plus) / (tf + doc_norms[doc])
+                        contributions[terms[i]] = value
+                        partial += weights[terms[i]] * value
+                        cursors[i] = pos + 1
+
+                full = len(heap) == k
+                for i in range(essential - 1, -1, -1):
+                    if full and partial + bounds[i] < threshold - _SCORE_EPS:
+                        break
+                    doc_ids, tfs = postings[i]
+                    pos = cursors[i] = bisect_left(doc_ids, doc, cursors[i])
+                    if pos < len(doc_ids) and doc_ids[pos] == doc:
+                        tf = tfs[pos]
+                        value = self.idf[terms[i]] * (tf * k1_plus) / (tf + doc_norms[doc])
+                        contributions[terms[i]] = value
+                        partial += weights[terms[i]] * value
+                else:
+                    # Sum in query order so scores match score() exactly
+                    doc_score = 0
+                    for tid in query_ids:
+                        if tid in contributions:
+                            doc_score += contributions[tid]
+
+                    entry = (doc_score, -doc)
+                    if not full:
+                        heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapreplace(heap, entry)
+                    if len(heap) == k:
+                        threshold = heap[0][0]
+                        while essential < len(terms) and bounds[essential] < threshold - _SCORE_EPS:
+                            essential += 1
+
+        with span("top_k"):
+            return [(-neg_idx, doc_score) for doc_score, neg_idx in sorted(heap, reverse=True)]
+
+    # ---- Phrases and proximity ----
+    def _posting(self, tid, doc):
+        """Position of a document in a term's postings, or None"""
+        doc_ids = self.postings[tid][0]
+        pos = bisect_left(doc_ids, doc)
+        return pos if pos < len(doc_ids) and doc_ids[pos] == doc else None
+
+    def phrase_docs(self, terms):
+        """Ascending ids of the documents containing terms as consecutive tokens"""
+        tids = [self.term_id(term) for term in terms]
+        if not tids or None in tids:
+            return []
+        lists = [self.postings[tid][0] for tid in tids]
+        order = sorted(range(len(tids)), key=lambda i: len(lists[i]))
+        rarest = order[0]
+        cursors = [0] * len(tids)
+        found = [0] * len(tids)
+        docs = []
+        for pos, doc in enumerate(lists[rarest]):
+            found[rarest] = pos
+            for i in order[1:]:
+                doc_ids = lists[i]
+                cursor = cursors[i] = bisect_left(doc_ids, doc, cursors[i])
+                if cursor == len(doc_ids):
+                    return docs
+                if doc_ids[cursor] != doc:
+                    break
+                found[i] = cursor
+            else:
+                # Start positions of the phrase: where terms[0] is followed by terms[1], terms[2]...
+                starts = set(self.postings.positions(tids[0], found[0]))
+                for i in range(1, len(tids)):
+                    starts.intersection_update(place - i for place in self.postings.positions(tids[i], found[i]))
+                    if not starts:
+                        break
+                else:
+                    docs.append(doc)
+        return docs
+
+    def score_docs(self, query, docs):
+        """BM25 scores of the given documents, equal to their score() entries"""
+        query_ids = [self.term_id(token) for token in self.tokenize(query)]
+        for tid in query_ids:
+            if tid is not None:
+                self._fresh(tid)
+        k1_plus = self.k1 + 1
         scores = []
+        for doc in docs:
+            doc_score = 0
+            for tid in query_ids:
+                pos = None if tid is None else self._posting(tid, doc)
+                if pos is not None:
+                    tf = self.postings[tid][1][pos]
+                    doc_score += self.idf[tid] * (tf * k1_plus) / (tf + self.doc_norms[doc])
+            scores.append(doc_score)
+        return scores
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
+    def _distance(self, first, second):
+        """Fewest positions from a first-term occurrence to a second-term one; one more when out of order"""
+        best = None
+        i = j = 0
+        while i < len(first) and j < len(second):
+            if first[i] < second[j]:
+                gap = second[j] - first[i]
+                i += 1
+            else:
+                gap = first[i] - second[j] + 1
+                j += 1
+            if best is None or gap < best:
+                best = gap
+        return best
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+    def rerank(self, query, hits):
+        """(idx, score) hits with a proximity boost added, best first (ties by id)"""
+        tids = []
+        for token in self.tokenize(query):
+            tid = self.term_id(token)
+            if tid is not None and tid not in tids:
+                tids.append(tid)
+        if len(tids) < 2:
+            return list(hits)
+        pairs = list(zip(tids, tids[1:]))
+        boosted = []
+        with span("proximity"):
+            for doc, doc_score in hits:
+                found = {tid: self._posting(tid, doc) for tid in tids}
+                for first, second in pairs:
+                    if found[first] is None or found[second] is None:
+                        continue
+                    distance = self._distance(self.postings.positions(first, found[first]),
+                                              self.postings.positions(second, found[second]))
+                    # Pairs adjacent in the query, boosted by the rarer term's idf over their distance
+                    if distance <= self.PROXIMITY_WINDOW:
+                        doc_score += self.PROXIMITY_WEIGHT * min(self.idf[first], self.idf[second]) / distance
+                boosted.append((doc, doc_score))
+        boosted.sort(key=lambda hit: (-hit[1], hit[0]))
+        return boosted
 
-            scores.append((idx, score))
+    def rank(self, query, k=MAX_RESULTS, groups=None):
+        """The k best (idx, score) pairs for a search query, best first"""
+        if k <= 0:
+            return []
+        # Phrases are required; proximity reorders the candidate pool but never widens it
+        phrases = self.phrases(query)
+        if not phrases:
+            return self.rerank(query, self.top_k(query, max(k, self.RERANK_POOL), groups))[:k]
+        with span("phrases"):
+            docs = self.phrase_docs(phrases[0])
+            for terms in phrases[1:]:
+                found = set(self.phrase_docs(terms))
+                docs = [doc for doc in docs if doc in found]
+            if groups is not None:
+                docs = [doc for doc in docs if self.doc_groups[doc] in groups]
+        with span("score"):
+            hits = list(zip(docs, self.score_docs(query, docs)))
+        return self.rerank(query, hits)[:k]
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+    def rank_batch(self, queries, k=MAX_RESULTS):
+        """rank() for many queries, pooling the queries without phrases through top_k_batch()"""
+        ranked = [None] * len(queries)
+        plain = [pos for pos, query in enumerate(queries) if not self.phrases(query)]
+        pools = self.top_k_batch([queries[pos] for pos in plain], max(k, self.RERANK_POOL)) if k > 0 else []
+        for pos, hits in zip(plain, pools):
+            ranked[pos] = self.rerank(queries[pos], hits)[:k]
+        return [self.rank(query, k) if hits is None else hits for query, hits in zip(queries, ranked)]
 
+    def impacts(self):
+        """Precomputed posting weights of an impact-ordered index, built on first use and dropped by updates"""
+        if self._impacts is None:
+            with span("impacts"):
+                self._impacts = _ImpactLists.build(self)
+        return self._impacts
 
-# ============ SEARCH FUNCTIONS ============
+    def _top_k_impacts(self, query_ids, weights, k, groups):
+        """top_k() over impact-ordered postings (Fagin's threshold algorithm)"""
+        impacts = self.impacts()
+        terms = list(weights)
+        lists = [impacts.ranked(tid) for tid in terms]
+        counts = [weights[tid] for tid in terms]
+        postings = {tid: (self.postings[tid][0], impacts[tid]) for tid in terms}
+        query_order = [tid for tid in query_ids if tid is not None]
+        cursor = 0
+        seen = set()
+        heap = []
+
+        with span("score"):
+            while True:
+                # The weights read this round bound the score of any document not yet seen
+                bound = 0
+                for (ranked_docs, ranked_weights), count in zip(lists, counts):
+                    if cursor >= len(ranked_docs):
+                        continue
+                    bound += count * ranked_weights[cursor]
+                    doc = ranked_docs[cursor]
+                    if doc in seen:
+                        continue
+                    seen.add(doc)
+                    if groups is not None and self.doc_groups[doc] not in groups:
+                        continue
+
+                    found = {}
+                    for tid in terms:
+                        doc_ids, term_weights = postings[tid]
+                        pos = bisect_left(doc_ids, doc)
+                        found[tid] = term_weights[pos] if pos < len(doc_ids) and doc_ids[pos] == doc else 0
+                    # Sum in query order so scores match score() exactly
+                    doc_score = 0
+                    for tid in query_order:
+                        doc_score += found[tid]
+
+                    entry = (doc_score, -doc)
+                    if len(heap) < k:
+                        heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapreplace(heap, entry)
+                cursor += 1
+                if not bound or (len(heap) == k and bound < heap[0][0] - _SCORE_EPS):
+                    break
+
+        with span("top_k"):
+            return [(-neg_idx, doc_score) for doc_score, neg_idx in sorted(heap, reverse=True)]
+
+    def sparse(self):
+        """NumPy backend over this index, or None when NumPy is not installed"""
+        if self._sparse is None:
+            try:
+                self._sparse = SparseBM25(self)
+            except ImportError:
+                return None
+        return self._sparse
+
+    def top_k_batch(self, queries, k=MAX_RESULTS):
+        """top_k() for many queries, vectorised through NumPy when available"""
+        sparse = self.sparse()
+        if sparse is None:
+            return [self.top_k(query, k) for query in queries]
+        return sparse.top_k_batch(queries, k)
+
+
+# ============ NUMPY BACKEND ============
+class SparseBM25:
+    """Vectorised BM25 over a fitted index, as a sparse matrix of precomputed weights"""
+
+    BATCH_CELLS = 1 << 22  # Max queries x documents scored per chunk
+
+    def __init__(self, bm25):
+        import numpy as np
+
+        bm25.refresh()
+        self.np = np
+        self.bm25 = bm25
+        self.N = bm25.N
+        indptr = [0]
+        indices = []
+        data = []
+        k1_plus = bm25.k1 + 1
+        for tid, (doc_ids, tfs) in enumerate(bm25.postings):
+            idf = bm25.idf[tid]
+            indices.extend(doc_ids)
+            data.extend(idf * (tf * k1_plus) / (tf + bm25.doc_norms[idx]) for idx, tf in zip(doc_ids, tfs))
+            indptr.append(len(indices))
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.indices = np.array(indices, dtype=np.int64)
+        self.data = np.array(data, dtype=np.float64)
+
+    def _query_terms(self, query):
+        """Column ids and multiplicities of a query's indexed tokens"""
+        counts = {}
+        for token in self.bm25.tokenize(query):
+            col = self.bm25.term_id(token)  # Columns are term ids
+            if col is not None:
+                counts[col] = counts.get(col, 0) + 1
+        return counts
+
+    def score_batch(self, queries):
+        """Dense (len(queries), N) score matrix for a batch of queries"""
+        np = self.np
+        rows = []
+        cols = []
+        weights = []
+        for row, query in enumerate(queries):
+            for col, count in self._query_terms(query).items():
+                rows.append(row)
+                cols.append(col)
+                weights.append(count)
+        if not cols:
+            return np.zeros((len(queries), self.N))
+
+        # Expand the sparse query matrix against the term-major postings
+        rows = np.array(rows, dtype=np.int64)
+        cols = np.array(cols, dtype=np.int64)
+        starts = self.indptr[cols]
+        lengths = self.indptr[cols + 1] - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        cells = np.repeat(rows * self.N, lengths) + self.indices[offsets]
+        values = np.repeat(np.array(weights, dtype=np.float64), lengths) * self.data[offsets]
+        scores = np.bincount(cells, weights=values, minlength=len(queries) * self.N)
+        return scores.reshape(len(queries), self.N)
+
+    def score(self, query):
+        """Dense score vector for a single query"""
+        return self.score_batch([query])[0]
+
+    def _select(self, scores, k):
+        """Top-k (idx, score) pairs of one score row, ties broken by index"""
+        np = self.np
+        if k < self.N:
+            kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+            candidates = np.flatnonzero((scores >= kth) & (scores > 0))
+        else:
+            candidates = np.flatnonzero(scores > 0)
+        order = np.lexsort((candidates, -scores[candidates]))[:k]
+        return [(int(idx), float(scores[idx])) for idx in candidates[order]]
+
+    def top_k(self, query, k=MAX_RESULTS):
+        """Return the k best (idx, score) pairs with score > 0, best first"""
+        return self.top_k_batch([query], k)[0]
+
+    def top_k_batch(self, queries, k=MAX_RESULTS):
+        """Top-k for each query, scoring chunks of queries in one product"""
+        if k <= 0 or self.N == 0:
+            return [[] for _ in queries]
+        results = []
+        chunk = max(1, self.BATCH_CELLS // self.N)
+        for start in range(0, len(queries), chunk):
+            with span("score"):
+                batch = self.score_batch(queries[start:start + chunk])
+            with span("top_k"):
+                results.extend(self._select(scores, k) for scores in batch)
+        return results
+
+
+# ============ ROW STORE ============
+class RowStore:
+    """Columnar store of the output columns of a CSV"""
+
+    __slots__ = ("columns", "positions", "values")
+
+    def __init__(self, columns, data):
+        self.columns = tuple(sys.intern(col) for col in columns)
+        self.positions = {col: pos for pos, col in enumerate(self.columns)}
+        self.values = tuple(self._column(data, col) for col in self.columns)
+
+    @staticmethod
+    def _column(data, col):
+        shared = {}
+        return tuple(shared.setdefault(value, value) for value in (row.get(col, "") for row in data))
+
+    @classmethod
+    def from_columns(cls, columns, values):
+        """Wrap existing column sequences (e.g. lazy snapshot columns) without copying"""
+        store = cls.__new__(cls)
+        store.__setstate__((tuple(columns), tuple(values)))
+        return store
+
+    @classmethod
+    def from_rows(cls, data, output_cols):
+        """Project parsed CSV rows onto the output columns present in the file"""
+        header = data[0].keys() if data else ()
+        return cls([col for col in output_cols if col in header], data)
+
+    def __len__(self):
+        return len(self.values[0]) if self.values else 0
+
+    def as_dict(self, idx):
+        """Result dict for one row, in output column order"""
+        return {col: column[idx] for col, column in zip(self.columns, self.values)}
+
+    def __getstate__(self):
+        return self.columns, self.values
+
+    def __setstate__(self, state):
+        self.columns, self.values = state
+        self.positions = {col: pos for pos, col in enumerate(self.columns)}
+
+
+# ============ INDEX CACHE ============
 def _load_csv(filepath):
     """Load CSV and return list of dicts"""
-    with open(filepath, 'r', encoding='utf-8') as f:
+    import csv  # Deferred: only needed when the index cache is stale
+
+    with span("csv_load"), open(filepath, 'r', encoding='utf-8') as f:
         return list(csv.DictReader(f))
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
+def _relative_path(filepath):
+    """Path of a data CSV relative to DATA_DIR (just the name for outside files)"""
+    try:
+        return filepath.relative_to(DATA_DIR)
+    except ValueError:
+        return Path(filepath.name)
+
+
+def _cache_path(filepath):
+    """Cache file for a data CSV, mirroring its path under DATA_DIR"""
+    return CACHE_DIR / _relative_path(filepath).with_suffix(".idx")
+
+
+def _content_hash(filepath):
+    """SHA-256 of the raw CSV bytes"""
+    import hashlib
+
+    with open(filepath, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _read_cache(cache_file):
+    """Load a pickled index, or None if it is missing or unreadable"""
+    try:
+        with open(cache_file, 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+
+def _write_cache(cache_file, entry):
+    """Atomically write a pickled index; a read-only tree just skips caching"""
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per thread: threads of one process may write the same cache entry at once
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.{get_ident()}.tmp")
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+
+def _index_options(config, search_cols):
+    """Keyword arguments (weights, analyzer) for the index functions from a domain config"""
+    weights = config.get("field_weights")
+    return {
+        "weights": tuple(float(weights.get(col, 1.0)) for col in search_cols) if weights else None,
+        "analyzer": get_analyzer(**config.get("analyzer", {}))
+    }
+
+
+def _document(row, search_cols, weights):
+    """A CSV row as a BM25 document: joined search columns, or one field per column for BM25F"""
+    if weights is None:
+        return " ".join(str(row.get(col, "")) for col in search_cols)
+    return [str(row.get(col, "")) for col in search_cols]
+
+
+def _row_keys(data, search_cols, output_cols):
+    """Fingerprint of the indexed and stored cells of each row, for diffing an edited CSV"""
+    from hashlib import blake2b
+
+    columns = list(dict.fromkeys([*search_cols, *output_cols]))
+    return [blake2b("\x1f".join(str(row.get(col, "")) for col in columns).encode("utf-8"), digest_size=8).digest()
+            for row in data]
+
+
+def _build_index(filepath, search_cols, output_cols, weights=None, analyzer=None):
+    """Parse a CSV, fit BM25 (BM25F with weights) over search columns and store the output columns"""
+    data = _load_csv(filepath)
+
+    bm25 = BM25(analyzer=analyzer)
+    bm25.fit([_document(row, search_cols, weights) for row in data], field_weights=weights,
+             keys=_row_keys(data, search_cols, output_cols), impacts=True)
+    return bm25, RowStore.from_rows(data, output_cols)
+
+
+def _update_index(filepath, bm25, search_cols, output_cols, weights=None):
+    """Bring an index fitted on an older version of a CSV up to date; None when a rebuild is due"""
+    if not isinstance(bm25.postings, _PostingLists) or len(bm25.doc_keys) != bm25.N:
+        return None
+    from difflib import SequenceMatcher
+
+    data = _load_csv(filepath)
+    keys = _row_keys(data, search_cols, output_cols)
+    # Only runs of added, removed or edited rows (by fingerprint) are parsed and analysed
+    edits = [op for op in SequenceMatcher(None, bm25.doc_keys, keys, autojunk=False).get_opcodes() if op[0] != "equal"]
+    if sum(max(i2 - i1, j2 - j1) for _, i1, i2, j1, j2 in edits) * 2 > len(keys):
+        return None
+
+    bm25.update([(i1, i2, [_document(row, search_cols, weights) for row in data[j1:j2]], None, keys[j1:j2])
+                 for _, i1, i2, j1, j2 in edits])
+    return bm25, RowStore.from_rows(data, output_cols)
+
+
+_SNAPSHOT = {}  # The memory-mapped snapshot, keyed by the snapshot file's stamp (None when pinned)
+
+
+def _open_snapshot():
+    """The data snapshot built by snapshot.py (or pinned by use_snapshot()), or None when absent or unusable"""
+    if None in _SNAPSHOT:
+        return _SNAPSHOT[None]
+    try:
+        stat = SNAPSHOT_FILE.stat()
+    except OSError:
+        return None
+    stamp = (stat.st_size, stat.st_mtime_ns)
+    if stamp not in _SNAPSHOT:
+        from snapshot import Snapshot
+
+        try:
+            snapshot = Snapshot(SNAPSHOT_FILE)
+        except (OSError, ValueError, EOFError, TypeError):
+            snapshot = None
+        _SNAPSHOT.clear()
+        _SNAPSHOT[stamp] = snapshot
+    return _SNAPSHOT[stamp]
+
+
+def use_snapshot(snapshot):
+    """Serve every table from the given Snapshot (e.g. in shared memory); None goes back to the file"""
+    _SNAPSHOT.clear()
+    if snapshot is not None:
+        _SNAPSHOT[None] = snapshot
+    # Loaded indexes are dropped so the next search picks the tables up
+    _INDEXES.clear()
+    _UNIFIED.clear()
+
+
+def load_rows(filepath):
+    """All rows of a data CSV as dicts, read from the snapshot when it is current"""
+    snapshot = _open_snapshot()
+    if snapshot:
+        stat = filepath.stat()
+        rows = snapshot.records(_relative_path(filepath).as_posix(), (stat.st_size, stat.st_mtime_ns))
+        if rows is not None:
+            return rows
+    return _load_csv(filepath)
+
+
+def _load_index(filepath, search_cols, output_cols, weights=None, analyzer=None):
+    """Return (bm25, rows) for a CSV from the snapshot or the on-disk cache when fresh"""
+    stat = filepath.stat()
+    snapshot = _open_snapshot()
+    if snapshot:
+        index = snapshot.index(_relative_path(filepath).as_posix(), (stat.st_size, stat.st_mtime_ns),
+                               search_cols, output_cols, weights, analyzer)
+        if index is not None:
+            return index
+
+    columns = (tuple(search_cols), tuple(output_cols), weights, (analyzer or DEFAULT_ANALYZER).options)
+    cache_file = _cache_path(filepath)
+    entry = _read_cache(cache_file)
+
+    index = None
+    if entry and entry.get("version") == CACHE_VERSION and entry.get("columns") == columns:
+        if (entry["size"], entry["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+            return entry["bm25"], entry["rows"]
+        # Touched but unchanged (e.g. by a checkout): the content hash decides
+        if entry["size"] == stat.st_size and entry["sha256"] == _content_hash(filepath):
+            entry["mtime_ns"] = stat.st_mtime_ns
+            _write_cache(cache_file, entry)
+            return entry["bm25"], entry["rows"]
+        # Content changed: diff its rows against the cached index
+        index = _update_index(filepath, entry["bm25"], search_cols, output_cols, weights)
+
+    bm25, rows = index or _build_index(filepath, search_cols, output_cols, weights, analyzer)
+    _write_cache(cache_file, {
+        "version": CACHE_VERSION,
+        "columns": columns,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": _content_hash(filepath),
+        "bm25": bm25,
+        "rows": rows
+    })
+    return bm25, rows
+
+
+# ============ RESULT CACHE ============
+class _ResultCache:
+    """Size-bounded LRU of search hits with hit/miss/eviction counters"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = allocate_lock()  # threading.Lock without importing threading
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "size": len(self._entries), "maxsize": self.maxsize}
+
+
+_RESULT_CACHE = _ResultCache(RESULT_CACHE_SIZE)
+
+
+def result_cache_info():
+    """Hit/miss/eviction counters and size of the search result cache"""
+    return _RESULT_CACHE.info()
+
+
+def clear_result_cache():
+    """Drop all cached search results and reset the counters"""
+    _RESULT_CACHE.clear()
+
+
+# ============ DOMAIN ROUTER ============
+DOMAIN_KEYWORDS = {
+    "color": ["color", "palette", "hex", "#", "rgb"],
+    "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
+    "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
+    "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
+    "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
+    "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
+    "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
+    "typography": ["font", "typography", "heading", "serif", "sans"],
+    "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
+    "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
+    "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+}
+
+
+def _is_word(char):
+    return char.isalnum() or char == "_"
+
+
+def _compile_keywords(domain_keywords):
+    """Character trie of the routing keywords, plus the keyword -> domains table."""
+    owners = defaultdict(list)
+    trie = {}
+    for domain, keywords in domain_keywords.items():
+        for keyword in keywords:
+            owners[keyword].append(domain)
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[None] = keyword  # None never collides with a character key
+    return trie, dict(owners)
+
+
+def _keyword_matches(text):
+    """Whole-word routing keywords in text, left to right without overlaps, the longest winning at each position."""
+    # One pass over text; boundaries apply only on word-character ends, so "#" still
+    # matches in "#fff" while "bar" does not match inside "sidebar"
+    matches = []
+    pos, length = 0, len(text)
+    while pos < length:
+        node = _KEYWORD_TRIE.get(text[pos])
+        # Every keyword starting here shares text[pos] as its first character
+        if node is None or pos and _is_word(text[pos]) and _is_word(text[pos - 1]):
+            pos += 1
+            continue
+        found, end = None, pos + 1
+        while node is not None:
+            keyword = node.get(None)
+            if keyword and not (_is_word(keyword[-1]) and end < length and _is_word(text[end])):
+                found = keyword
+            if end == length:
+                break
+            node = node.get(text[end])
+            end += 1
+        if found:
+            matches.append(found)
+            pos += len(found)
+        else:
+            pos += 1
+    return matches
+
+
+_KEYWORD_TRIE, _KEYWORD_DOMAINS = _compile_keywords(DOMAIN_KEYWORDS)
+_DOMAIN_ORDER = {domain: pos for pos, domain in enumerate(DOMAIN_KEYWORDS)}  # Tie-break, as the old keyword scan
+_VOCABULARY = {}  # term -> domains whose index contains it, keyed by the stamps of the domain CSVs
+_ROUTER_LEXICON = {}  # Lexicon of the router vocabulary, keyed by its id; set with _VOCABULARY
+
+
+def _domain_vocabulary():
+    """Map each indexed term to the domains whose index contains it"""
+    specs = [spec for spec in _index_specs() if spec[0] in CSV_CONFIG and spec[1].exists()]
+    stamps = _stamps(specs)
+
+    cached = _VOCABULARY.get(stamps)
+    if cached is not None:
+        return cached
+
+    cache_file = CACHE_DIR / "router.idx"
+    entry = _read_cache(cache_file)
+    if not entry or entry.get("version") != CACHE_VERSION or entry.get("stamps") != stamps:
+        vocabulary = defaultdict(list)
+        for label, filepath, search_cols, output_cols, options in specs:
+            for term in _get_index(filepath, search_cols, output_cols, **options)[1].indexed_terms():
+                vocabulary[term].append(label)
+        vocabulary = {term: tuple(domains) for term, domains in vocabulary.items()}
+        # Terms ranked by the number of domains containing them
+        lexicon = Lexicon({term: len(domains) for term, domains in vocabulary.items()})
+        entry = {"version": CACHE_VERSION, "stamps": stamps, "vocabulary": vocabulary, "lexicon": lexicon}
+        _write_cache(cache_file, entry)
+
+    _VOCABULARY.clear()
+    _VOCABULARY[stamps] = entry["vocabulary"]
+    _ROUTER_LEXICON.clear()
+    _ROUTER_LEXICON[id(entry["vocabulary"])] = entry["lexicon"]
+    return entry["vocabulary"]
+
+
+def _router_lexicon(vocabulary):
+    """Lexicon over the router vocabulary, stored with it in .cache/router.idx"""
+    return _ROUTER_LEXICON[id(vocabulary)]
+
+
+def route_query(query):
+    """Confidence per domain for a query, best first; empty when nothing matches"""
+    query_lower = query.lower()
+    terms = set(DEFAULT_ANALYZER.query(query))
+    vocabulary = _domain_vocabulary() if terms else {}
+    if FUZZY_QUERIES and any(term not in vocabulary for term in terms):
+        lexicon = _router_lexicon(vocabulary)
+        corrections = []
+        for token in terms - vocabulary.keys():
+            found = lexicon.lookup(token)
+            if found:
+                terms.discard(token)
+                corrections.extend(found)
+        terms.update(corrections)
+        query_lower = " ".join([query_lower, *corrections])
+
+    # Each routing keyword adds 1 to its domains; each query term adds 1 / (domains containing it),
+    # averaged over the terms, so data overlap breaks keyword ties. Confidences sum to 1.
+    scores = defaultdict(float)
+    for keyword in _keyword_matches(query_lower):
+        for domain in _KEYWORD_DOMAINS[keyword]:
+            scores[domain] += 1
+
+    for term in terms:
+        domains = vocabulary.get(term, ())
+        for domain in domains:
+            scores[domain] += 1 / (len(domains) * len(terms))
+
+    total = sum(scores.values())
+    if not total:
+        return {}
+    ranked = sorted(scores, key=lambda domain: (-scores[domain], _DOMAIN_ORDER.get(domain, len(_DOMAIN_ORDER))))
+    return {domain: scores[domain] / total for domain in ranked}
+
+
+# ============ SEARCH FUNCTIONS ============
+_INDEXES = {}  # Indexes loaded by this process, keyed by CSV path and columns
+
+
+def _get_index(filepath, search_cols, output_cols, weights=None, analyzer=None):
+    """Return (stamp, bm25, rows) for a CSV, loaded at most once per process until it changes"""
+    stat = filepath.stat()
+    stamp = (stat.st_size, stat.st_mtime_ns)
+    key = (filepath, tuple(search_cols), tuple(output_cols), weights, analyzer)
+    cached = _INDEXES.get(key)
+    if cached and cached[0] == stamp:
+        return cached
+
+    # Build fully before publishing: concurrent readers keep the old entry until this swap
+    with span("load_index"):
+        bm25, rows = _load_index(filepath, search_cols, output_cols, weights, analyzer)
+    bm25.known_terms = _dictionary
+    entry = _INDEXES[key] = (stamp, bm25, rows)
+    return entry
+
+
+_DICTIONARY = {}  # Every term of every domain and stack index, keyed by the stamps of their CSVs
+_DICTIONARY_LOCK = allocate_lock()  # One thread loads the dictionary; concurrent callers wait for it
+
+
+def _dictionary():
+    """Every term any domain or stack index contains"""
+    # Fuzzy lookup leaves alone real words one domain lacks; every index is loaded only when
+    # both the snapshot and .cache/terms.idx are stale
+    specs = [spec for spec in _index_specs() if spec[1].exists()]
+    stamps = _stamps(specs)
+    cached = _DICTIONARY.get(stamps)
+    if cached is not None:
+        return cached
+    with _DICTIONARY_LOCK:
+        cached = _DICTIONARY.get(stamps)  # Loaded by another thread while this one waited
+        if cached is not None:
+            return cached
+        snapshot = _open_snapshot()
+        terms = None
+        if snapshot:
+            tables = {_relative_path(spec[1]).as_posix(): stamp[1:] for spec, stamp in zip(specs, stamps)}
+            terms = snapshot.dictionary(tables)
+        if terms is None:
+            cache_file = CACHE_DIR / "terms.idx"
+            entry = _read_cache(cache_file)
+            if not entry or entry.get("version") != CACHE_VERSION or entry.get("stamps") != stamps:
+                terms = set()
+                for _, filepath, search_cols, output_cols, options in specs:
+                    terms.update(_get_index(filepath, search_cols, output_cols, **options)[1].indexed_terms())
+                entry = {"version": CACHE_VERSION, "stamps": stamps, "terms": frozenset(terms)}
+                _write_cache(cache_file, entry)
+            terms = entry["terms"]
+        _DICTIONARY.clear()
+        _DICTIONARY[stamps] = terms
+        return terms
+
+
+def _index_specs():
+    """(label, filepath, search_cols, output_cols, options) for every domain and stack CSV"""
+    for domain, config in CSV_CONFIG.items():
+        yield (domain, DATA_DIR / config["file"], config["search_cols"], config["output_cols"],
+               _index_options(config, config["search_cols"]))
+    stack_options = _index_options(_STACK_COLS, _STACK_COLS["search_cols"])
+    for stack, config in STACK_CONFIG.items():
+        yield (f"stack:{stack}", DATA_DIR / config["file"], _STACK_COLS["search_cols"], _STACK_COLS["output_cols"],
+               stack_options)
+
+
+def _stamps(specs):
+    """(label, size, mtime) of the CSV of each _index_specs() entry"""
+    stamps = []
+    for label, filepath, _, _, _ in specs:
+        stat = filepath.stat()
+        stamps.append((label, stat.st_size, stat.st_mtime_ns))
+    return tuple(stamps)
+
+
+def refresh_indexes():
+    """Load every domain and stack index, rebuilding stale ones; return the CSVs that were (re)loaded"""
+    loaded = []
+    for _, filepath, search_cols, output_cols, options in _index_specs():
+        if not filepath.exists():
+            continue
+        key = (filepath, tuple(search_cols), tuple(output_cols), options["weights"], options["analyzer"])
+        before = _INDEXES.get(key)
+        _get_index(filepath, search_cols, output_cols, **options)
+        if _INDEXES.get(key) is not before:
+            loaded.append(filepath)
+    return loaded
+
+
+def _search_csv(filepath, search_cols, output_cols, query, max_results, weights=None, analyzer=None):
     """Core search function using BM25"""
     if not filepath.exists():
         return []
 
-    data = _load_csv(filepath)
+    stamp, bm25, rows = _get_index(filepath, search_cols, output_cols, weights, analyzer)
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+    # Top results with score > 0, keyed on the normalised query and data version
+    key = (filepath, tuple(search_cols), tuple(output_cols), weights, analyzer, stamp, tuple(bm25.tokenize(query)),
+           bm25.phrases(query), max_results)
+    hits = _RESULT_CACHE.get(key)
+    if hits is None:
+        hits = tuple(idx for idx, _ in bm25.rank(query, max_results))
+        _RESULT_CACHE.put(key, hits)
+    return [rows.as_dict(idx) for idx in hits]
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
 
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
+_UNIFIED = {}  # The cross-domain index, keyed by the stamps of every source CSV
 
-    return results
 
+def _get_unified_index():
+    """Return (bm25, tables) for one index over every domain and stack"""
+    specs = [spec for spec in _index_specs() if spec[1].exists()]
+    stamps = _stamps(specs)
 
-def detect_domain(query):
-    """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
+    cached = _UNIFIED.get(stamps)
+    if cached:
+        return cached
+
+    cache_file = CACHE_DIR / "all.idx"
+    entry = _read_cache(cache_file)
+    if not entry or entry.get("version") != CACHE_VERSION or entry.get("stamps") != stamps:
+        documents = []
+        groups = []
+        field_weights = {}
+        for group, (_, filepath, search_cols, _, options) in enumerate(specs):
+            weights = options["weights"]
+            # Tables without field weights are one field of weight 1, which scores as plain BM25
+            field_weights[group] = weights or (1.0,)
+            for row in _load_csv(filepath):
+                fields = [str(row.get(col, "")) for col in search_cols]
+                documents.append(fields if weights else [" ".join(fields)])
+                groups.append(group)
+        # Shared idf with per-table length norms ranks hits from different domains together
+        bm25 = BM25()
+        bm25.fit(documents, groups, field_weights, impacts=True)
+        entry = {"version": CACHE_VERSION, "stamps": stamps, "bm25": bm25}
+        _write_cache(cache_file, entry)
 
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
-        "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
-        "typography": ["font", "typography", "heading", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
-        "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+    bm25 = entry["bm25"]
+    tables = []
+    for group, (label, filepath, search_cols, output_cols, options) in enumerate(specs):
+        rows = _get_index(filepath, search_cols, output_cols, **options)[2]
+        tables.append((label, _relative_path(filepath).as_posix(), rows, bisect_left(bm25.doc_groups, group)))
+
+    _UNIFIED.clear()
+    _UNIFIED[stamps] = (bm25, tables)
+    return bm25, tables
+
+
+def search_all(query, domains=None, max_results=MAX_RESULTS):
+    """Search every domain and stack (or the given labels) in a single scoring pass"""
+    bm25, tables = _get_unified_index()
+    labels = [label for label, _, _, _ in tables]
+    if domains is None:
+        groups = None
+    else:
+        unknown = [domain for domain in domains if domain not in labels]
+        if unknown:
+            return {"error": f"Unknown domain: {', '.join(unknown)}. Available: {', '.join(labels)}",
+                    "domain": ",".join(domains)}
+        groups = {labels.index(domain) for domain in domains}
+
+    results = []
+    files = []
+    for idx, _ in bm25.rank(query, max_results, groups):
+        label, file, rows, first = tables[bm25.doc_groups[idx]]
+        results.append({"Domain": label, **rows.as_dict(idx - first)})
+        if file not in files:
+            files.append(file)
+
+    return {
+        "domain": ALL_DOMAINS if domains is None else ",".join(domains),
+        "query": query,
+        "file": ", ".join(files),
+        "count": len(results),
+        "results": results
     }
 
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
-    best = max(scores, key=scores.get)
-    return best if scores[best] > 0 else "style"
+
+def check_max_results(value):
+    """value as a max_results int; ValueError unless it is a positive integer (or one as a string)"""
+    try:
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid max_results: {value!r} (expected a positive integer)") from None
+    if number < 1:
+        raise ValueError(f"Invalid max_results: {value!r} (expected a positive integer)")
+    return number
+
+
+def detect_domain(query):
+    """Auto-detect the most relevant domain from query ("style" when nothing matches)"""
+    with span("route"):
+        confidences = route_query(query)
+    return next(iter(confidences), "style")
 
 
 def search(query, domain=None, max_results=MAX_RESULTS):
     """Main search function with auto-domain detection"""
     if domain is None:
         domain = detect_domain(query)
+    if domain == ALL_DOMAINS:
+        return search_all(query, None, max_results)
+    # Comma lists and stack labels; search_all() rejects unknown labels
+    if domain not in CSV_CONFIG:
+        return search_all(query, [d.strip() for d in domain.split(",") if d.strip()], max_results)
 
-    config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
+    config = CSV_CONFIG[domain]
     filepath = DATA_DIR / config["file"]
 
     if not filepath.exists():
         return {"error": f"File not found: {filepath}", "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results,
+                          **_index_options(config, config["search_cols"]))
 
     return {
         "domain": domain,
@@ -235,6 +2213,42 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     }
 
 
+def search_many(queries, domain=None, max_results=MAX_RESULTS):
+    """Run search() for many queries, fitting each domain's index once"""
+    groups = defaultdict(list)
+    for pos, query in enumerate(queries):
+        groups[domain or detect_domain(query)].append(pos)
+
+    responses = [None] * len(queries)
+    for group_domain, positions in groups.items():
+        if group_domain not in CSV_CONFIG:  # "all", comma lists and stack labels, one query at a time
+            for pos in positions:
+                responses[pos] = search(queries[pos], group_domain, max_results)
+            continue
+        config = CSV_CONFIG[group_domain]
+        filepath = DATA_DIR / config["file"]
+
+        if not filepath.exists():
+            for pos in positions:
+                responses[pos] = {"error": f"File not found: {filepath}", "domain": group_domain}
+            continue
+
+        _, bm25, rows = _get_index(filepath, config["search_cols"], config["output_cols"],
+                                   **_index_options(config, config["search_cols"]))
+        ranked = bm25.rank_batch([queries[pos] for pos in positions], max_results)
+        for pos, hits in zip(positions, ranked):
+            results = [rows.as_dict(idx) for idx, _ in hits]
+            responses[pos] = {
+                "domain": group_domain,
+                "query": queries[pos],
+                "file": config["file"],
+                "count": len(results),
+                "results": results
+            }
+
+    return responses
+
+
 def search_stack(query, stack, max_results=MAX_RESULTS):
     """Search stack-specific guidelines"""
     if stack not in STACK_CONFIG:
@@ -245,7 +2259,8 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"Stack file not found: {filepath}", "stack": stack}
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results,
+                          **_index_options(_STACK_COLS, _STACK_COLS["search_cols"]))
 
     return {
         "domain": "stack",
@@ -7,83 +7,184 @@ to generate comprehensive design system recommendations.
 Usage:
     from design_system import generate_design_system
     result = generate_design_system("SaaS dashboard", "My Project")
+
+    python design_system.py "SaaS dashboard" [-p "My Project"] [-f ascii|markdown|json]
+    python design_system.py --batch jobs.jsonl [--workers 8] [-f json]
+    python design_system.py "SaaS dashboard" --profile [tree|json]
 """
 
-import csv
+from time import perf_counter
+
+_STARTED = perf_counter()  # Module imports are reported as the "import" span under --profile
+
 import json
+import os
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from core import search, DATA_DIR
+from core import search, load_rows, span, current_span, DATA_DIR
+
+_IMPORTED = perf_counter()
 
 
 # ============ CONFIGURATION ============
 REASONING_FILE = "ui-reasoning.csv"
+OUTPUT_FORMATS = ("ascii", "markdown", "json")
 
+# Style keeps a small pool for _select_best_match to pick the reasoning rule's priority style from;
+# field-weighted (BM25F) ranking puts the best match first in the other domains
 SEARCH_CONFIG = {
     "product": {"max_results": 1},
     "style": {"max_results": 3},
-    "color": {"max_results": 2},
-    "landing": {"max_results": 2},
-    "typography": {"max_results": 2}
+    "color": {"max_results": 1},
+    "landing": {"max_results": 1},
+    "typography": {"max_results": 1}
 }
 
+SEARCH_WORKERS = 4  # Threads running the domain searches of one design system
+BATCH_IN_FLIGHT = 4  # Batch jobs queued per worker process; bounds how far input is read ahead of output
+
+_POOL = []  # The shared search thread pool, created on first use
+
+
+def _search_pool() -> ThreadPoolExecutor:
+    """Thread pool shared by all generators; searches run against the process-wide fitted indexes."""
+    if not _POOL:
+        _POOL.append(ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix="design-search"))
+    return _POOL[0]
+
+
+def _domain_search(parent, query: str, domain: str, max_results: int) -> dict:
+    """search() for one domain, profiled as its own span under the span that submitted it."""
+    with span(f"search:{domain}", parent):
+        return search(query, domain, max_results)
+
+
+def _substrings(text: str) -> set:
+    """Every substring of text, including the empty string."""
+    return {text[i:j] for i in range(len(text) + 1) for j in range(i, len(text) + 1)}
+
+
+def _style_view(result: dict) -> tuple:
+    """Lowercased style name, keywords and whole result of a style search result, as _select_best_match scores it."""
+    return result.get("Style Category", "").lower(), result.get("Keywords", "").lower(), str(result).lower()
+
 
 # ============ DESIGN SYSTEM GENERATOR ============
 class DesignSystemGenerator:
     """Generates design system recommendations from aggregated searches."""
 
     def __init__(self):
-        self.reasoning_data = self._load_reasoning()
+        with span("reasoning_load"):
+            self.reasoning_data = self._load_reasoning()
+            self._compile_reasoning()
+        self._style_views = {}  # Cell values -> _style_view of every style row seen as a candidate
 
     def _load_reasoning(self) -> list:
         """Load reasoning rules from CSV."""
         filepath = DATA_DIR / REASONING_FILE
         if not filepath.exists():
             return []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
-
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
-        results = {}
-        for domain, config in SEARCH_CONFIG.items():
-            if domain == "style" and style_priority:
-                # For style, also search with priority keywords
-                priority_query = " ".join(style_priority[:2]) if style_priority else query
-                combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
-            else:
-                results[domain] = search(query, domain, config["max_results"])
+        return load_rows(filepath)
+
+    def _submit_searches(self, query: str) -> dict:
+        """Start every domain search that needs only the raw query (all but style) on the pool."""
+        pool = _search_pool()
+        parent = current_span()
+        return {domain: pool.submit(_domain_search, parent, query, domain, config["max_results"])
+                for domain, config in SEARCH_CONFIG.items() if domain != "style"}
+
+    def _multi_domain_search(self, query: str, style_priority: list = None, pending: dict = None) -> dict:
+        """Execute searches across multiple domains"""
+        # pending searches are already running; the style search needs the rule's style priority
+        if pending is None:
+            pending = self._submit_searches(query)
+
+        style_query = query
+        if style_priority:
+            # For style, also search with priority keywords
+            style_query = f"{query} {' '.join(style_priority[:2])}"
+        with span("search:style"):
+            results = {"style": search(style_query, "style", SEARCH_CONFIG["style"]["max_results"])}
+
+        for domain, future in pending.items():
+            results[domain] = future.result()
         return results
 
-    def _find_reasoning_rule(self, category: str) -> dict:
-        """Find matching reasoning rule for a category."""
-        category_lower = category.lower()
-
-        # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
+    def _compile_reasoning(self) -> None:
+        """Index the reasoning rules once for _find_reasoning_rule()"""
+        self._exact = {}
+        self._keywords = {}
+        categories = []
+        self._reasonings = []
+        self._resolved = {}  # category -> rule position (or None), memoised
 
-        # Try partial match
-        for rule in self.reasoning_data:
+        for pos, rule in enumerate(self.reasoning_data):
             ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
+            self._exact.setdefault(ui_cat, pos)
+            categories.append(ui_cat)
+            for keyword in ui_cat.replace("/", " ").replace("-", " ").split():
+                self._keywords.setdefault(keyword, pos)
+
+            # Parse decision rules JSON
+            decision_rules = {}
+            try:
+                decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
+            except json.JSONDecodeError:
+                pass
+
+            self._reasonings.append({
+                "pattern": rule.get("Recommended_Pattern", ""),
+                "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
+                "color_mood": rule.get("Color_Mood", ""),
+                "typography_mood": rule.get("Typography_Mood", ""),
+                "key_effects": rule.get("Key_Effects", ""),
+                "anti_patterns": rule.get("Anti_Patterns", ""),
+                "decision_rules": decision_rules,
+                "severity": rule.get("Severity", "MEDIUM")
+            })
+
+        # One newline-joined string finds the first rule category containing a text in a single search
+        self._category_text = "\n".join(categories)
+        self._category_starts = []
+        offset = 0
+        for ui_cat in categories:
+            self._category_starts.append(offset)
+            offset += len(ui_cat) + 1
+
+    def _find_rule_position(self, category: str):
+        """Position of the matching reasoning rule for a category, or None."""
+        category_lower = category.lower()
+        if category_lower in self._resolved:
+            return self._resolved[category_lower]
 
-        # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
+        # Try exact match first
+        pos = self._exact.get(category_lower)
+        if pos is None:
+            substrings = _substrings(category_lower)
+            # Try partial match: a rule category inside the category, or the category inside a rule category
+            candidates = [self._exact[sub] for sub in substrings if sub in self._exact]
+            found = self._category_text.find(category_lower) if self.reasoning_data else -1
+            if found >= 0:
+                candidates.append(bisect_right(self._category_starts, found) - 1)
+            if not candidates:
+                # Try keyword match
+                candidates = [self._keywords[sub] for sub in substrings if sub in self._keywords]
+            pos = min(candidates) if candidates else None
+
+        self._resolved[category_lower] = pos
+        return pos
 
-        return {}
+    def _find_reasoning_rule(self, category: str) -> dict:
+        """Find matching reasoning rule for a category."""
+        pos = self._find_rule_position(category)
+        return {} if pos is None else self.reasoning_data[pos]
 
     def _apply_reasoning(self, category: str, search_results: dict) -> dict:
         """Apply reasoning rules to search results."""
-        rule = self._find_reasoning_rule(category)
+        pos = self._find_rule_position(category)
 
-        if not rule:
+        if pos is None:
             return {
                 "pattern": "Hero + Features + CTA",
                 "style_priority": ["Minimalism", "Flat Design"],
@@ -95,23 +196,8 @@ class DesignSystemGenerator:
                 "severity": "MEDIUM"
             }
 
-        # Parse decision rules JSON
-        decision_rules = {}
-        try:
-            decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
-        except json.JSONDecodeError:
-            pass
-
-        return {
-            "pattern": rule.get("Recommended_Pattern", ""),
-            "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
-            "color_mood": rule.get("Color_Mood", ""),
-            "typography_mood": rule.get("Typography_Mood", ""),
-            "key_effects": rule.get("Key_Effects", ""),
-            "anti_patterns": rule.get("Anti_Patterns", ""),
-            "decision_rules": decision_rules,
-            "severity": rule.get("Severity", "MEDIUM")
-        }
+        reasoning = self._reasonings[pos]
+        return {**reasoning, "style_priority": list(reasoning["style_priority"])}
 
     def _select_best_match(self, results: list, priority_keywords: list) -> dict:
         """Select best matching result based on priority keywords."""
@@ -121,63 +207,71 @@ class DesignSystemGenerator:
         if not priority_keywords:
             return results[0]
 
+        views = [self._candidate_view(result) for result in results]
+        priorities = [priority.lower().strip() for priority in priority_keywords]
+
         # First: try exact style name match
-        for priority in priority_keywords:
-            priority_lower = priority.lower().strip()
-            for result in results:
-                style_name = result.get("Style Category", "").lower()
-                if priority_lower in style_name or style_name in priority_lower:
+        for priority in priorities:
+            for result, (style_name, _, _) in zip(results, views):
+                if priority in style_name or style_name in priority:
                     return result
 
         # Second: score by keyword match in all fields
         scored = []
-        for result in results:
-            result_str = str(result).lower()
+        for result, (style_name, keywords, fields) in zip(results, views):
             score = 0
-            for kw in priority_keywords:
-                kw_lower = kw.lower().strip()
+            for kw in priorities:
                 # Higher score for style name match
-                if kw_lower in result.get("Style Category", "").lower():
+                if kw in style_name:
                     score += 10
                 # Lower score for keyword field match
-                elif kw_lower in result.get("Keywords", "").lower():
+                elif kw in keywords:
                     score += 3
                 # Even lower for other field matches
-                elif kw_lower in result_str:
+                elif kw in fields:
                     score += 1
             scored.append((score, result))
 
         scored.sort(key=lambda x: x[0], reverse=True)
         return scored[0][1] if scored and scored[0][0] > 0 else results[0]
 
+    def _candidate_view(self, result: dict) -> tuple:
+        """_style_view of a style result, built once per row and kept for later calls."""
+        key = tuple(result.values())
+        view = self._style_views.get(key)
+        if view is None:
+            view = self._style_views[key] = _style_view(result)
+        return view
+
     def _extract_results(self, search_result: dict) -> list:
         """Extract results list from search result dict."""
         return search_result.get("results", [])
 
     def generate(self, query: str, project_name: str = None) -> dict:
         """Generate complete design system recommendation."""
-        # Step 1: First search product to get category
-        product_result = search(query, "product", 1)
+        # Step 1: Start the query-only domain searches concurrently; product gives the category
+        pending = self._submit_searches(query)
+        product_result = pending["product"].result()
         product_results = product_result.get("results", [])
         category = "General"
         if product_results:
             category = product_results[0].get("Product Type", "General")
 
         # Step 2: Get reasoning rules for this category
-        reasoning = self._apply_reasoning(category, {})
+        with span("reasoning"):
+            reasoning = self._apply_reasoning(category, {})
         style_priority = reasoning.get("style_priority", [])
 
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+        # Step 3: Style search with priority hints, joined with the searches already running
+        search_results = self._multi_domain_search(query, style_priority, pending)
 
-        # Step 4: Select best matches from each domain using priority
+        # Step 4: Pick the style by the rule's priority, and the top match from every other domain
         style_results = self._extract_results(search_results.get("style", {}))
         color_results = self._extract_results(search_results.get("color", {}))
         typography_results = self._extract_results(search_results.get("typography", {}))
         landing_results = self._extract_results(search_results.get("landing", {}))
 
-        best_style = self._select_best_match(style_results, reasoning.get("style_priority", []))
+        best_style = self._select_best_match(style_results, style_priority)
         best_color = color_results[0] if color_results else {}
         best_typography = typography_results[0] if typography_results else {}
         best_landing = landing_results[0] if landing_results else {}
@@ -453,36 +547,162 @@ def format_markdown(design_system: dict) -> str:
 
 
 # ============ MAIN ENTRY POINT ============
-def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii") -> str:
+def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii",
+                           generator: DesignSystemGenerator = None) -> str:
     """
     Main entry point for design system generation.
 
     Args:
         query: Search query (e.g., "SaaS dashboard", "e-commerce luxury")
         project_name: Optional project name for output header
-        output_format: "ascii" (default) or "markdown"
+        output_format: "ascii" (default), "markdown" or "json" (one line)
+        generator: Optional pre-loaded generator to reuse (e.g. in a server)
 
     Returns:
         Formatted design system string
     """
-    generator = DesignSystemGenerator()
-    design_system = generator.generate(query, project_name)
-
-    if output_format == "markdown":
-        return format_markdown(design_system)
-    return format_ascii_box(design_system)
+    generator = generator or DesignSystemGenerator()
+    with span("generate"):
+        design_system = generator.generate(query, project_name)
+
+    with span("format"):
+        if output_format == "json":
+            return json.dumps(design_system, ensure_ascii=False)
+        if output_format == "markdown":
+            return format_markdown(design_system)
+        return format_ascii_box(design_system)
+
+
+# ============ BATCH GENERATION ============
+_WORKER_GENERATOR = []  # The warm generator of a pool worker process
+
+
+def _init_worker() -> None:
+    """Pool initializer: load one generator per worker process."""
+    _WORKER_GENERATOR.append(DesignSystemGenerator())
+
+
+def _error_line(job: dict, message: str) -> str:
+    """A batch job's error, in its output format."""
+    if job.get("format") == "json":
+        return json.dumps({"error": message}, ensure_ascii=False)
+    return f"Error: {message}"
+
+
+def _run_job(job: dict) -> str:
+    """Format one batch job (or its parse error) with the worker's generator; a failing job becomes an error line."""
+    if "error" in job:
+        return _error_line(job, job["error"])
+    generator = _WORKER_GENERATOR[0] if _WORKER_GENERATOR else None
+    try:
+        return generate_design_system(job["query"], job["project_name"], job["format"], generator)
+    except Exception as e:
+        return _error_line(job, f"{type(e).__name__}: {e}")
+
+
+def _job_result(job: dict, future) -> str:
+    """A pooled job's output, or an error line when its worker failed."""
+    try:
+        return future.result()
+    except Exception as e:
+        return _error_line(job, f"{type(e).__name__}: {e}")
+
+
+def parse_jobs(lines, project_name: str = None, output_format: str = "ascii"):
+    """Yield batch jobs from lines of input: plain queries or JSON objects overriding the defaults"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        job = {"query": line, "project_name": project_name, "format": output_format}
+        if line.startswith("{"):
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:  # An error job keeps output aligned with input
+                job["error"] = f"Invalid JSON: {e}"
+            else:
+                job["query"] = str(request.get("query", ""))
+                job["project_name"] = request.get("project_name", project_name)
+                job["format"] = request.get("format", output_format)
+                if job["format"] not in OUTPUT_FORMATS:
+                    job["error"] = f"Unknown format: {job['format']}. Available: {', '.join(OUTPUT_FORMATS)}"
+                    job["format"] = output_format  # The error line matches the rest of the batch
+        yield job
+
+
+def generate_batch(jobs, workers: int = None):
+    """Yield formatted design systems for many jobs, in input order, from a process pool"""
+    # Each worker keeps one warm generator; a failed job yields an error line and the batch goes on
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        _WORKER_GENERATOR[:] = [DesignSystemGenerator()]
+        for job in jobs:
+            yield _run_job(job)
+        return
+
+    import threading
+    from concurrent.futures import ProcessPoolExecutor
+    from queue import Queue
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        # (job, future) in input order, then None; bounded so jobs are read lazily, a few per worker ahead
+        submitted = Queue(maxsize=workers * BATCH_IN_FLIGHT)
+
+        def feed():
+            try:
+                for job in jobs:
+                    submitted.put((job, pool.submit(_run_job, job)))
+            except BaseException as e:  # Reading input failed: re-raised in the consumer, in order
+                submitted.put(e)
+            submitted.put(None)
+
+        threading.Thread(target=feed, name="design-batch-feed", daemon=True).start()
+        while True:
+            item = submitted.get()
+            if item is None:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield _job_result(*item)
 
 
 # ============ CLI SUPPORT ============
 if __name__ == "__main__":
     import argparse
+    import sys
 
     parser = argparse.ArgumentParser(description="Generate Design System")
-    parser.add_argument("query", help="Search query (e.g., 'SaaS dashboard')")
+    parser.add_argument("query", nargs="?", help="Search query (e.g., 'SaaS dashboard')")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name")
-    parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format")
+    parser.add_argument("--format", "-f", choices=OUTPUT_FORMATS, default="ascii", help="Output format")
+    parser.add_argument("--batch", "-b", metavar="FILE", help="Read jobs (queries or JSON objects) from FILE, or - for stdin")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="Worker processes for --batch (default: CPU count)")
+    parser.add_argument("--profile", nargs="?", const="tree", choices=["tree", "json"],
+                        help="Print timing spans and tracemalloc allocations to stderr as a tree or JSON")
+    parser.add_argument("--timings", nargs="?", const="tree", choices=["tree", "json"],
+                        help="Like --profile, without allocation tracing")
 
     args = parser.parse_args()
-
-    result = generate_design_system(args.query, args.project_name, args.format)
-    print(result)
+    if args.query is None and not args.batch:
+        parser.error("the following arguments are required: query")
+
+    def run():
+        if args.batch:
+            source = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+            with source:
+                for result in generate_batch(parse_jobs(source, args.project_name, args.format), args.workers):
+                    print(result, flush=True)
+        else:
+            result = generate_design_system(args.query, args.project_name, args.format)
+            print(result)
+
+    profile = args.profile or args.timings
+    if profile:
+        from core import Profiler
+
+        with Profiler(allocations=args.profile is not None) as profiler:
+            profiler.record("import", _IMPORTED - _STARTED)
+            run()
+        print(profiler.report(profile), file=sys.stderr)
+    else:
+        run()
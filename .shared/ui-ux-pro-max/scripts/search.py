@@ -1,76 +1,246 @@
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-"""
-UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
-Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
-       python search.py "<query>" --design-system [-p "Project Name"]
-
-Domains: style, prompt, color, chart, landing, product, ux, typography
-Stacks: html-tailwind, react, nextjs
-"""
-
-import argparse
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system
-
-
-def format_output(result):
-    """Format results for Claude consumption (token-optimized)"""
-    if "error" in result:
-        return f"Error: {result['error']}"
-
-    output = []
-    if result.get("stack"):
-        output.append(f"## UI Pro Max Stack Guidelines")
-        output.append(f"**Stack:** {result['stack']} | **Query:** {result['query']}")
-    else:
-        output.append(f"## UI Pro Max Search Results")
-        output.append(f"**Domain:** {result['domain']} | **Query:** {result['query']}")
-    output.append(f"**Source:** {result['file']} | **Found:** {result['count']} results\n")
-
-    for i, row in enumerate(result['results'], 1):
-        output.append(f"### Result {i}")
-        for key, value in row.items():
-            value_str = str(value)
-            if len(value_str) > 300:
-                value_str = value_str[:300] + "..."
-            output.append(f"- **{key}:** {value_str}")
-        output.append("")
-
-    return "\n".join(output)
-
-
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
-    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
-    parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
-    parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
-    parser.add_argument("--json", action="store_true", help="Output as JSON")
-    # Design system generation
-    parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
-    parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
-    parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format for design system")
-
-    args = parser.parse_args()
-
-    # Design system takes priority
-    if args.design_system:
-        result = generate_design_system(args.query, args.project_name, args.format)
-        print(result)
-    # Stack search
-    elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
-    # Domain search
-    else:
-        result = search(args.query, args.domain, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
+Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
+       python search.py "<query>" --domain all|<domain>,<domain>,...
+       python search.py "<query>" --design-system [-p "Project Name"]
+       python search.py --batch [--domain <domain>] [--stack <stack>] < queries.jsonl
+       python search.py --batch --design-system [-f json] [--workers 8] < jobs.jsonl
+       python search.py --serve [--port 0] [--workers N]
+       python search.py "<query>" --profile [tree|json]   (or --timings, without allocation tracing)
+
+When a server started with --serve is running, single queries are forwarded
+to it (use --local to bypass it). --profile and --timings always search
+in-process and print the timing span tree to stderr.
+
+Quote words to require them as a phrase: python search.py '"dark mode" dashboard'
+
+Domains: style, prompt, color, chart, landing, product, ux, typography
+         all (every domain and stack), or a comma list such as color,stack:react
+Stacks: html-tailwind, react, nextjs
+"""
+
+from time import perf_counter
+
+_STARTED = perf_counter()  # Module imports are reported as the "import" span under --profile
+
+import argparse
+import sys
+from core import (CSV_CONFIG, AVAILABLE_STACKS, ALL_DOMAINS, MAX_RESULTS, check_max_results, search, search_many,
+                  search_stack, span)
+from client import forward
+
+_IMPORTED = perf_counter()
+
+BATCH_SIZE = 64  # --batch lines read before their queries are searched together through search_many()
+
+# Heavier modules (json, design_system, server) are imported only on the
+# code paths that need them, keeping a plain search close to bare startup.
+
+
+def format_output(result):
+    """Format results for Claude consumption (token-optimized)"""
+    if "error" in result:
+        return f"Error: {result['error']}"
+
+    output = []
+    if result.get("stack"):
+        output.append(f"## UI Pro Max Stack Guidelines")
+        output.append(f"**Stack:** {result['stack']} | **Query:** {result['query']}")
+    else:
+        output.append(f"## UI Pro Max Search Results")
+        output.append(f"**Domain:** {result['domain']} | **Query:** {result['query']}")
+    output.append(f"**Source:** {result['file']} | **Found:** {result['count']} results\n")
+
+    for i, row in enumerate(result['results'], 1):
+        output.append(f"### Result {i}")
+        for key, value in row.items():
+            value_str = str(value)
+            if len(value_str) > 300:
+                value_str = value_str[:300] + "..."
+            output.append(f"- **{key}:** {value_str}")
+        output.append("")
+
+    return "\n".join(output)
+
+
+def domain_arg(value):
+    """argparse type for --domain: a domain, "all", or a comma list of domains and stack:<name> labels"""
+    if value in CSV_CONFIG or value == ALL_DOMAINS:
+        return value
+    labels = list(CSV_CONFIG) + [f"stack:{stack}" for stack in AVAILABLE_STACKS]
+    parts = [part.strip() for part in value.split(",") if part.strip()]
+    unknown = [part for part in parts if part not in labels]
+    if not parts or unknown:
+        raise argparse.ArgumentTypeError(
+            f"invalid domain: {value!r} (choose from {', '.join(labels)}, {ALL_DOMAINS}, or a comma list)")
+    return ",".join(parts)
+
+
+def max_results_arg(value):
+    """argparse type for --max-results: a positive integer"""
+    try:
+        return check_max_results(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)[0].lower() + str(e)[1:]) from None
+
+
+def _batch_request(request, domain, stack, max_results):
+    """(query, domain, stack, max_results) of one --batch request; ValueError when a field is invalid"""
+    if not isinstance(request, dict):
+        raise ValueError("Invalid request: expected a JSON object")
+    query = request.get("query")
+    query = "" if query is None else str(query)
+
+    n = check_max_results(request.get("max_results", max_results))
+
+    line_domain = request.get("domain", domain)
+    if line_domain is not None:
+        try:
+            line_domain = domain_arg(str(line_domain))
+        except argparse.ArgumentTypeError as e:
+            raise ValueError(str(e)[0].upper() + str(e)[1:]) from None
+
+    line_stack = request.get("stack", stack) or None
+    if line_stack is not None and line_stack not in AVAILABLE_STACKS:
+        raise ValueError(f"Unknown stack: {line_stack}. Available: {', '.join(AVAILABLE_STACKS)}")
+    return query, line_domain, line_stack, n
+
+
+def _search_requests(requests):
+    """Results for parsed requests (errors pass through), with same-domain queries grouped into search_many()"""
+    from collections import defaultdict
+
+    results = list(requests)
+    groups = defaultdict(list)
+    for pos, request in enumerate(requests):
+        if isinstance(request, dict):  # An {"error": ...} line
+            continue
+        query, domain, stack, n = request
+        if stack:
+            results[pos] = search_stack(query, stack, n)
+        else:
+            groups[domain, n].append(pos)
+    for (domain, n), positions in groups.items():
+        for pos, result in zip(positions, search_many([requests[pos][0] for pos in positions], domain, n)):
+            results[pos] = result
+    return results
+
+
+def run_batch(lines, domain=None, stack=None, max_results=MAX_RESULTS, batch_size=BATCH_SIZE):
+    """Yield one JSON result line per input line (a query or a JSON request), in input order"""
+    import json
+
+    def answer(requests):
+        for result in _search_requests(requests):
+            yield json.dumps(result, ensure_ascii=False)
+
+    requests = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        request = {"query": line}
+        if line.startswith("{"):
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                requests.append({"error": f"Invalid JSON: {e}"})
+                continue
+        try:
+            requests.append(_batch_request(request, domain, stack, max_results))
+        except ValueError as e:
+            requests.append({"error": str(e)})
+        # Batches let search_many() score queries for the same domain together
+        if len(requests) >= batch_size:
+            yield from answer(requests)
+            requests = []
+    yield from answer(requests)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max Search")
+    parser.add_argument("query", nargs="?", help="Search query")
+    parser.add_argument("--domain", "-d", type=domain_arg, help="Search domain, 'all', or a comma list (e.g. color,stack:react)")
+    parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
+    parser.add_argument("--max-results", "-n", type=max_results_arg, default=MAX_RESULTS, help="Max results (default: 3)")
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--batch", action="store_true", help="Read queries (text or JSON objects) from stdin, one per line, and stream JSONL results")
+    # Design system generation
+    parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
+    parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
+    parser.add_argument("--format", "-f", choices=["ascii", "markdown", "json"], default="ascii", help="Output format for design system")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="Worker processes for --batch --design-system (default: CPU count), or for --serve over a shared memory index")
+    # Resident server
+    parser.add_argument("--serve", action="store_true", help="Run a resident search server with warm indexes and hot reload")
+    parser.add_argument("--port", type=int, default=0, help="Server port for --serve (default: any free port)")
+    parser.add_argument("--local", action="store_true", help="Search in-process even if a server is running")
+    # Profiling
+    parser.add_argument("--profile", nargs="?", const="tree", choices=["tree", "json"],
+                        help="Print timing spans and tracemalloc allocations to stderr as a tree or JSON")
+    parser.add_argument("--timings", nargs="?", const="tree", choices=["tree", "json"],
+                        help="Like --profile, without allocation tracing")
+
+    args = parser.parse_args()
+    if args.query is None and not (args.batch or args.serve):
+        parser.error("the following arguments are required: query")
+
+    def run():
+        # Resident server
+        if args.serve:
+            from server import serve, serve_workers
+            if args.workers:
+                serve_workers(port=args.port, workers=args.workers)
+            else:
+                serve(port=args.port)
+        # Batch design systems stream one formatted result per job, across a process pool
+        elif args.batch and args.design_system:
+            with span("import"):
+                from design_system import parse_jobs, generate_batch
+            for result in generate_batch(parse_jobs(sys.stdin, args.project_name, args.format), args.workers):
+                print(result, flush=True)
+        # Batch mode streams one JSON line per query
+        elif args.batch:
+            for line in run_batch(sys.stdin, args.domain, args.stack, args.max_results):
+                print(line, flush=True)
+        # Design system takes priority
+        elif args.design_system:
+            with span("import"):
+                from design_system import generate_design_system
+            request = {"op": "design_system", "query": args.query, "project_name": args.project_name, "format": args.format}
+            result = None if args.local else forward(request)
+            if result is None:
+                result = generate_design_system(args.query, args.project_name, args.format)
+            print(result)
+        # Stack or domain search
+        else:
+            if args.stack:
+                request = {"op": "search_stack", "query": args.query, "stack": args.stack, "max_results": args.max_results}
+            else:
+                request = {"op": "search", "query": args.query, "domain": args.domain, "max_results": args.max_results}
+            result = None if args.local else forward(request)
+            if result is None:
+                if args.stack:
+                    result = search_stack(args.query, args.stack, args.max_results)
+                else:
+                    result = search(args.query, args.domain, args.max_results)
+            with span("format"):
+                if args.json:
+                    import json
+                    output = json.dumps(result, indent=2, ensure_ascii=False)
+                else:
+                    output = format_output(result)
+            print(output)
+
+    profile = args.profile or args.timings
+    if profile:
+        from core import Profiler
+
+        args.local = True  # Spans are only recorded in this process
+        with Profiler(allocations=args.profile is not None) as profiler:
+            profiler.record("import", _IMPORTED - _STARTED)
+            run()
+        print(profiler.report(profile), file=sys.stderr)
+    else:
+        run()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Server - Resident search daemon with hot reload
+
+Keeps every domain and stack index warm in memory and answers search,
+search_stack and design_system requests over localhost HTTP. The data
+directory is polled for changes; a changed CSV is rebuilt in the background
+and swapped in atomically, so in-flight requests always see a complete index.
+With --workers N, worker processes share one listening socket and read the
+indexes from a snapshot image in shared memory, republished on data changes.
+
+Usage: python search.py --serve [--port 0] [--reload-interval 1.0] [--workers N]
+
+Protocol: POST / with a JSON body such as
+    {"op": "search", "query": "glassmorphism", "domain": "style", "max_results": 3}
+    {"op": "search_stack", "query": "forms", "stack": "react"}
+    {"op": "design_system", "query": "SaaS dashboard", "project_name": "X", "format": "markdown"}
+and receive {"result": ...} or {"error": "..."}.
+"""
+
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from client import STATE_FILE
+
+# ============ CONFIGURATION ============
+DEFAULT_HOST = "127.0.0.1"
+RELOAD_INTERVAL = 1.0  # Seconds between data directory scans
+SEGMENT_NAME_SIZE = 64  # Bytes reserved for the name of the current shared index segment
+
+
+# ============ SERVER ============
+class SearchServer(ThreadingHTTPServer):
+    """HTTP server holding warm indexes and a shared design system generator."""
+
+    daemon_threads = True
+
+    def __init__(self, address, reload_interval: float = RELOAD_INTERVAL, listener=None):
+        from core import DATA_DIR, refresh_indexes
+        from design_system import DesignSystemGenerator, REASONING_FILE
+
+        super().__init__(address, _Handler, bind_and_activate=listener is None)
+        if listener is not None:
+            # Accept on a socket shared with other worker processes
+            self.socket.close()
+            self.socket = listener
+            self.server_address = listener.getsockname()
+        self._refresh_indexes = refresh_indexes
+        self._generator_class = DesignSystemGenerator
+        self.reasoning_path = DATA_DIR / REASONING_FILE
+        self.reload_interval = reload_interval
+        self.stopped = threading.Event()
+
+        refresh_indexes()
+        self.reasoning_stamp = self._stamp(self.reasoning_path)
+        self.generator = DesignSystemGenerator()
+
+    @staticmethod
+    def _stamp(path: Path):
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def reload(self) -> list:
+        """Rebuild indexes (and reasoning rules) whose CSV changed since the last scan."""
+        changed = [str(path) for path in self._refresh_indexes()]
+        stamp = self._stamp(self.reasoning_path)
+        if stamp != self.reasoning_stamp:
+            self.generator = self._generator_class()  # Swap only once fully loaded
+            self.reasoning_stamp = stamp
+            changed.append(str(self.reasoning_path))
+        return changed
+
+    def watch(self):
+        """Poll the data directory until the server stops."""
+        while not self.stopped.wait(self.reload_interval):
+            try:
+                for path in self.reload():
+                    print(f"Reloaded {path}", file=sys.stderr)
+            except Exception as e:  # Keep serving the previous indexes
+                print(f"Reload failed: {e}", file=sys.stderr)
+
+    def dispatch(self, request: dict):
+        """Run one search request."""
+        from core import MAX_RESULTS, check_max_results, search, search_stack
+        from design_system import generate_design_system
+
+        op = request.get("op", "search")
+        query = str(request.get("query", ""))
+        max_results = check_max_results(request.get("max_results", MAX_RESULTS))
+
+        if op == "search":
+            return search(query, request.get("domain"), max_results)
+        if op == "search_stack":
+            return search_stack(query, request.get("stack"), max_results)
+        if op == "design_system":
+            return generate_design_system(query, request.get("project_name"),
+                                          request.get("format", "ascii"), generator=self.generator)
+        raise ValueError(f"Unknown op: {op}")
+
+
+class _WorkerServer(SearchServer):
+    """SearchServer in a worker process, answering from the parent's shared index segment."""
+
+    def __init__(self, listener, segment_name):
+        self.segment_name = segment_name
+        self.attached = None
+        self._segments = []  # Attached segments, newest last
+        self._attach_lock = threading.Lock()
+        self._attach()
+        listener.setblocking(False)  # Another worker may win the race to accept a connection
+        super().__init__(listener.getsockname(), listener=listener)
+
+    def _attach(self):
+        """Serve from the segment the parent published last."""
+        from multiprocessing.shared_memory import SharedMemory
+        from core import use_snapshot
+        from snapshot import Snapshot
+
+        with self.segment_name.get_lock():
+            name = self.segment_name.value.decode()
+        segment = SharedMemory(name)
+        use_snapshot(Snapshot.from_buffer(segment.buf.toreadonly(), name))
+        self._segments.append(segment)
+        self.attached = name
+
+        # Older segments can be unmapped once no index or row view into them is left
+        for old in self._segments[:-1]:
+            try:
+                old.close()
+            except BufferError:
+                continue
+            self._segments.remove(old)
+
+    def dispatch(self, request: dict):
+        if self.segment_name.value.decode() != self.attached:
+            with self._attach_lock:
+                if self.segment_name.value.decode() != self.attached:
+                    self._attach()
+                    self.reload()
+                    self.generator = self._generator_class()  # Drop rows of the old segment
+        return super().dispatch(request)
+
+
+def _run_worker(listener, segment_name):
+    """Worker process entry point: serve until the parent terminates it."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C reaches the parent, which stops the workers
+    server = _WorkerServer(listener, segment_name)
+    server.serve_forever()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """JSON request handler for SearchServer."""
+
+    def _reply(self, status: int, payload: dict):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._reply(200, {"result": {"status": "ok", "pid": os.getpid()}})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            self._reply(200, {"result": self.server.dispatch(request)})
+        except Exception as e:
+            self._reply(400, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _write_state(host: str, port: int):
+    """Advertise the server address to thin clients."""
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = STATE_FILE.with_name(f"{STATE_FILE.name}.{os.getpid()}.tmp")
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({"host": host, "port": port, "pid": os.getpid()}, f)
+    os.replace(tmp_file, STATE_FILE)
+
+
+def _clear_state():
+    """Remove the state file if it still points at this process."""
+    try:
+        with open(STATE_FILE, 'r', encoding='utf-8') as f:
+            if json.load(f).get("pid") == os.getpid():
+                STATE_FILE.unlink()
+    except (OSError, ValueError):
+        pass
+
+
+def serve(host: str = DEFAULT_HOST, port: int = 0, reload_interval: float = RELOAD_INTERVAL):
+    """Run the search server until interrupted."""
+    server = SearchServer((host, port), reload_interval)
+    host, port = server.server_address[:2]
+    _write_state(host, port)
+    watcher = threading.Thread(target=server.watch, name="data-watcher", daemon=True)
+    watcher.start()
+    signal.signal(signal.SIGTERM, signal.default_int_handler)  # Clean up on kill as on Ctrl+C
+    print(f"UI Pro Max search server on http://{host}:{port}", file=sys.stderr)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stopped.set()
+        server.server_close()
+        _clear_state()
+
+
+def _publish():
+    """Pack every index into a new shared memory segment."""
+    from multiprocessing.shared_memory import SharedMemory
+    from snapshot import pack
+
+    image = pack()
+    segment = SharedMemory(create=True, size=len(image))
+    segment.buf[:len(image)] = image
+    return segment
+
+
+def _data_stamps() -> dict:
+    """Size and mtime of every CSV in the data directory."""
+    from core import DATA_DIR
+
+    stamps = {}
+    for path in DATA_DIR.rglob("*.csv"):
+        stat = path.stat()
+        stamps[path] = (stat.st_size, stat.st_mtime_ns)
+    return stamps
+
+
+def serve_workers(host: str = DEFAULT_HOST, port: int = 0, workers: int = None,
+                  reload_interval: float = RELOAD_INTERVAL):
+    """Run the search server as worker processes over one shared index until interrupted."""
+    import multiprocessing
+    import socket
+    from core import refresh_indexes
+
+    workers = workers or os.cpu_count() or 1
+    context = multiprocessing.get_context()
+    refresh_indexes()  # Fills the index cache workers fall back to for tables edited since publishing
+    stamps = _data_stamps()
+    segment = _publish()
+    segment_name = context.Array("c", SEGMENT_NAME_SIZE)
+    segment_name.value = segment.name.encode()
+
+    listener = socket.create_server((host, port))
+    host, port = listener.getsockname()[:2]
+
+    def start(idx):
+        process = context.Process(target=_run_worker, args=(listener, segment_name),
+                                  name=f"search-worker-{idx}", daemon=True)
+        process.start()
+        return process
+
+    processes = [start(idx) for idx in range(workers)]
+    _write_state(host, port)
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f"UI Pro Max search server on http://{host}:{port} ({workers} workers)", file=sys.stderr)
+
+    try:
+        while True:
+            time.sleep(reload_interval)
+            for idx, process in enumerate(processes):
+                if not process.is_alive():
+                    processes[idx] = start(idx)
+            current = _data_stamps()
+            if current == stamps:
+                continue
+            try:
+                refresh_indexes()
+                published = _publish()
+            except Exception as e:  # Keep serving the previous segment
+                print(f"Reload failed: {e}", file=sys.stderr)
+                continue
+            with segment_name.get_lock():
+                segment_name.value = published.name.encode()
+            # Workers still mapping the old segment keep it alive until they switch
+            segment.close()
+            segment.unlink()
+            segment = published
+            stamps = current
+            print("Published a new shared index", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+        listener.close()
+        segment.close()
+        segment.unlink()
+        _clear_state()
+
+
+# ============ CLI SUPPORT ============
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="UI Pro Max Search Server")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=0, help="Port (default: any free port)")
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL, help="Seconds between data scans")
+    parser.add_argument("--workers", "-w", type=int, default=None,
+                        help="Serve from N worker processes over a shared memory index")
+
+    args = parser.parse_args()
+    if args.workers:
+        serve_workers(args.host, args.port, args.workers, args.reload_interval)
+    else:
+        serve(args.host, args.port, args.reload_interval)
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Snapshot - Memory-mapped binary image of the data directory
+
+Compiles every CSV under data/ into one file of string tables, postings,
+precomputed idf/length norms and lexicon delete tables, which core maps
+read-only instead of parsing CSVs; only the cells of returned rows are
+decoded. The image can also be packed into memory (pack()) and read from
+any buffer, such as a shared memory segment (Snapshot.from_buffer()).
+
+Usage: python snapshot.py [--output PATH]
+
+Layout (native byte order, sections 8-byte aligned):
+    MAGIC | u64 header length | marshal header | section data
+The header records each table's source stamp, columns, BM25 parameters and
+the (offset, length, typecode) of its sections relative to the data start.
+A table whose CSV no longer matches its stamp is ignored, so core falls
+back to the regular index cache for it until the snapshot is rebuilt.
+"""
+
+import marshal
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+from core import (BM25, CACHE_VERSION, DATA_DIR, DEFAULT_ANALYZER, SNAPSHOT_FILE, Lexicon, RowStore,
+                  _build_index, _ImpactLists, _index_specs, _load_csv, _PackedStrings)
+
+# ============ CONFIGURATION ============
+MAGIC = b"UIPROSNP"
+SNAPSHOT_VERSION = 2
+_LENGTH = struct.Struct("<Q")
+_ALIGN = 8
+
+
+# ============ WRITER ============
+class _SectionWriter:
+    """Accumulates aligned binary sections and their locations."""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def add(self, typecode: str, values) -> tuple:
+        data = array(typecode, values).tobytes()
+        location = (self.size, len(data), typecode)
+        padding = -len(data) % _ALIGN
+        self.chunks.append(data + b"\0" * padding)
+        self.size += len(data) + padding
+        return location
+
+    def add_strings(self, values) -> dict:
+        """Store a column of strings as offsets into one UTF-8 blob; None cells are listed separately."""
+        blob = bytearray()
+        offsets = [0]
+        nulls = []
+        for idx, value in enumerate(values):
+            if value is None:
+                nulls.append(idx)
+            else:
+                blob += str(value).encode("utf-8")
+            offsets.append(len(blob))
+        return {"offsets": self.add("I", offsets), "blob": self.add("B", blob), "nulls": tuple(nulls)}
+
+
+def _index_table(writer: _SectionWriter, stamp: tuple, search_cols, bm25: BM25, rows: RowStore) -> dict:
+    """Sections for a BM25-indexed table."""
+    bm25.refresh()
+    terms = sorted(bm25.indexed_terms(), key=lambda term: term.encode("utf-8"))
+    tids = [bm25.vocab[term] for term in terms]
+    post_offsets = [0]
+    post_docs = []
+    post_tfs = []
+    post_starts = []
+    post_positions = []
+    for tid in tids:
+        doc_ids, tfs = bm25.postings[tid]
+        post_docs.extend(doc_ids)
+        post_tfs.extend(tfs)
+        post_offsets.append(len(post_docs))
+        for pos in range(len(doc_ids)):
+            post_starts.append(len(post_positions))
+            post_positions.extend(bm25.postings.positions(tid, pos))
+    post_starts.append(len(post_positions))
+    if bm25.impact_ordered:
+        impacts = bm25.impacts()
+        impact_weights = []
+        ranked_docs = []
+        ranked_weights = []
+        for tid in tids:
+            impact_weights.extend(impacts[tid])
+            docs, weights = impacts.ranked(tid)
+            ranked_docs.extend(docs)
+            ranked_weights.extend(weights)
+
+    # The lexicon's terms are the table's terms in the same order, so only its delete table is stored
+    lexicon = bm25.lexicon()
+
+    table = _rows_table(writer, stamp, rows)
+    table.update({
+        "search_cols": tuple(search_cols),
+        "field_weights": bm25.field_weights,
+        "analyzer": bm25.analyzer.options,
+        "k1": bm25.k1,
+        "b": bm25.b,
+        "N": bm25.N,
+        "avgdl": bm25.avgdl,
+        "terms": writer.add_strings(terms),
+        "idf": writer.add("d", (bm25.idf[tid] for tid in tids)),
+        "max_scores": writer.add("d", (bm25.max_scores[tid] for tid in tids)),
+        "post_offsets": writer.add("I", post_offsets),
+        "post_docs": writer.add("I", post_docs),
+        "post_tfs": writer.add("I" if bm25.field_weights is None else "d", post_tfs),
+        "post_starts": writer.add("I", post_starts),
+        "post_positions": writer.add("I", post_positions),
+        "doc_norms": writer.add("d", bm25.doc_norms),
+        "doc_lengths": writer.add("I", bm25.doc_lengths),
+        "deletes": {"offsets": writer.add("I", lexicon.deletes.offsets),
+                    "blob": writer.add("B", lexicon.deletes.blob), "nulls": ()},
+        "delete_offsets": writer.add("I", lexicon.delete_offsets),
+        "delete_terms": writer.add("I", lexicon.delete_terms)
+    })
+    if bm25.impact_ordered:
+        table["impact_weights"] = writer.add("d", impact_weights)
+        table["ranked_docs"] = writer.add("I", ranked_docs)
+        table["ranked_weights"] = writer.add("d", ranked_weights)
+    return table
+
+
+def _rows_table(writer: _SectionWriter, stamp: tuple, rows: RowStore) -> dict:
+    """Sections for the stored columns of a table."""
+    return {
+        "stamp": stamp,
+        "search_cols": None,
+        "columns": rows.columns,
+        "rows": len(rows),
+        "cells": tuple(writer.add_strings(column) for column in rows.values)
+    }
+
+
+def _add_records(writer: _SectionWriter, table: dict, data: list) -> None:
+    """Add the CSV columns a table does not store and any overflow cells, so Snapshot.records() rebuilds its rows."""
+    header = tuple(col for col in data[0] if col is not None) if data else table["columns"]
+    extra = RowStore.from_rows(data, [col for col in header if col not in table["columns"]])
+    table["header"] = header
+    table["extra_columns"] = extra.columns
+    table["extra_cells"] = tuple(writer.add_strings(column) for column in extra.values)
+    # Cells beyond the header, kept by csv.DictReader as a list under None
+    table["overflow"] = {idx: tuple(row[None]) for idx, row in enumerate(data) if None in row}
+
+
+def _compile() -> tuple:
+    """Compile every CSV under DATA_DIR into (image prefix, section chunks)."""
+    writer = _SectionWriter()
+    tables = {}
+    dictionary = set()  # Every term of every indexed table, for core's known-term check
+
+    for _, filepath, search_cols, output_cols, options in _index_specs():
+        if filepath.exists():
+            stat = filepath.stat()
+            bm25, rows = _build_index(filepath, search_cols, output_cols, **options)
+            name = filepath.relative_to(DATA_DIR).as_posix()
+            tables[name] = _index_table(writer, (stat.st_size, stat.st_mtime_ns), search_cols, bm25, rows)
+            _add_records(writer, tables[name], _load_csv(filepath))
+            dictionary.update(bm25.indexed_terms())
+    indexed = {name: table["stamp"] for name, table in tables.items()}
+
+    # Plain tables (e.g. ui-reasoning.csv) keep every column and no index
+    for filepath in sorted(DATA_DIR.rglob("*.csv")):
+        name = filepath.relative_to(DATA_DIR).as_posix()
+        if name not in tables:
+            stat = filepath.stat()
+            data = _load_csv(filepath)
+            rows = RowStore.from_rows(data, list(data[0].keys()) if data else [])
+            tables[name] = _rows_table(writer, (stat.st_size, stat.st_mtime_ns), rows)
+            _add_records(writer, tables[name], data)
+
+    header = marshal.dumps({
+        "version": SNAPSHOT_VERSION,
+        "cache_version": CACHE_VERSION,
+        "byteorder": sys.byteorder,
+        "tables": tables,
+        "dictionary": {"tables": indexed,
+                       "terms": writer.add_strings(sorted(dictionary, key=lambda term: term.encode("utf-8")))}
+    })
+    start = len(MAGIC) + _LENGTH.size + len(header)
+    padding = -start % _ALIGN
+    return MAGIC + _LENGTH.pack(len(header) + padding) + header + b"\0" * padding, writer.chunks
+
+
+def pack() -> bytes:
+    """Compile every CSV under DATA_DIR into an in-memory snapshot image."""
+    prefix, chunks = _compile()
+    return b"".join([prefix, *chunks])
+
+
+def build(output=SNAPSHOT_FILE) -> dict:
+    """Compile every CSV under DATA_DIR into a snapshot file; returns the header."""
+    prefix, chunks = _compile()
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = output.with_name(f"{output.name}.{os.getpid()}.tmp")
+    with open(tmp_file, 'wb') as f:
+        f.write(prefix)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(tmp_file, output)
+    return Snapshot.from_buffer(prefix).header
+
+
+# ============ READER ============
+class _Strings(_PackedStrings):
+    """Lazily decoded string column: offsets into a UTF-8 blob."""
+
+    __slots__ = ("nulls",)
+
+    def __init__(self, offsets, blob, nulls=()):
+        super().__init__(offsets, blob)
+        self.nulls = frozenset(nulls)
+
+    def __getitem__(self, idx):
+        if idx in self.nulls:
+            return None
+        return super().__getitem__(idx)
+
+
+class _TermIds:
+    """Binary search over the sorted term dictionary, memoising lookups."""
+
+    def __init__(self, terms: _Strings):
+        self.terms = terms
+        self._ids = {}
+
+    def find(self, term: str) -> int:
+        tid = self._ids.get(term)
+        if tid is None:
+            tid = self._ids[term] = self.terms.find(term)
+        return tid
+
+
+class _TermMap(Mapping):
+    """Read-only term -> term id mapping backed by the term dictionary."""
+
+    def __init__(self, term_ids: _TermIds):
+        self._term_ids = term_ids
+
+    def __getitem__(self, term):
+        tid = self._term_ids.find(term)
+        if tid < 0:
+            raise KeyError(term)
+        return tid
+
+    def __contains__(self, term):
+        return self._term_ids.find(term) >= 0
+
+    def __iter__(self):
+        terms = self._term_ids.terms
+        return (terms[tid] for tid in range(len(terms)))
+
+    def __len__(self):
+        return len(self._term_ids.terms)
+
+
+class _Postings:
+    """Read-only sequence of (doc ids, tfs) slices by term id, their lengths as doc_freqs, and positions."""
+
+    def __init__(self, offsets, docs, tfs, starts, positions):
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+        self.starts = starts
+        self.position_values = positions
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, tid):
+        start, end = self.offsets[tid], self.offsets[tid + 1]
+        return self.docs[start:end], self.tfs[start:end]
+
+    def __iter__(self):
+        return (self[tid] for tid in range(len(self)))
+
+    def positions(self, tid, pos):
+        posting = self.offsets[tid] + pos
+        return self.position_values[self.starts[posting]:self.starts[posting + 1]]
+
+    def lengths(self):
+        return _Lengths(self.offsets)
+
+
+class _Lengths:
+    """Read-only sequence of the differences between consecutive offsets."""
+
+    def __init__(self, offsets):
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        return self.offsets[idx + 1] - self.offsets[idx]
+
+    def __iter__(self):
+        return (self[idx] for idx in range(len(self)))
+
+
+class Snapshot:
+    """Read-only memory-mapped snapshot of the data directory."""
+
+    def __init__(self, path=SNAPSHOT_FILE):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._load(memoryview(self._mmap), path)
+
+    @classmethod
+    def from_buffer(cls, buffer, name: str = "<buffer>") -> "Snapshot":
+        """Snapshot over an image already in memory (e.g. a shared memory segment), without copying."""
+        snapshot = cls.__new__(cls)
+        snapshot._mmap = None
+        snapshot._load(memoryview(buffer), name)
+        return snapshot
+
+    def _load(self, view: memoryview, path) -> None:
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"Not a snapshot file: {path}")
+        (length,) = _LENGTH.unpack_from(view, len(MAGIC))
+        start = len(MAGIC) + _LENGTH.size
+        self.header = marshal.loads(view[start:start + length])
+        if (self.header.get("version"), self.header.get("cache_version"), self.header.get("byteorder")) != \
+                (SNAPSHOT_VERSION, CACHE_VERSION, sys.byteorder):
+            raise ValueError(f"Incompatible snapshot: {path}")
+        self._data = view[start + length:]
+
+    def _section(self, location):
+        offset, length, typecode = location
+        return self._data[offset:offset + length].cast(typecode)
+
+    def _strings(self, cells: dict) -> _Strings:
+        return _Strings(self._section(cells["offsets"]), self._section(cells["blob"]), cells["nulls"])
+
+    def _table(self, name: str, stamp: tuple):
+        table = self.header["tables"].get(name)
+        return table if table and table["stamp"] == stamp else None
+
+    def dictionary(self, stamps: dict):
+        """Every term of the indexed tables (supports in), or None unless those are exactly the tables at stamps."""
+        dictionary = self.header["dictionary"]
+        if dictionary["tables"] != stamps:
+            return None
+        return _TermMap(_TermIds(self._strings(dictionary["terms"])))
+
+    def rows(self, name: str, stamp: tuple):
+        """RowStore over a table's stored columns, or None if missing or stale."""
+        table = self._table(name, stamp)
+        if table is None:
+            return None
+        return RowStore.from_columns(table["columns"], [self._strings(cells) for cells in table["cells"]])
+
+    def records(self, name: str, stamp: tuple):
+        """Every row of a table as the dict csv.DictReader gives for it, or None if missing or stale."""
+        table = self._table(name, stamp)
+        if table is None:
+            return None
+        cells = dict(zip(table["columns"] + table["extra_columns"], table["cells"] + table["extra_cells"]))
+        rows = RowStore.from_columns(table["header"], [self._strings(cells[col]) for col in table["header"]])
+        records = [rows.as_dict(idx) for idx in range(len(rows))]
+        for idx, values in table["overflow"].items():
+            records[idx][None] = list(values)
+        return records
+
+    def index(self, name: str, stamp: tuple, search_cols, output_cols, weights=None, analyzer=None):
+        """(bm25, rows) for an indexed table, or None if missing, stale or built with other options."""
+        analyzer = analyzer or DEFAULT_ANALYZER
+        table = self._table(name, stamp)
+        if table is None or (table["search_cols"], table.get("field_weights"), table.get("analyzer")) != \
+                (tuple(search_cols), weights, analyzer.options):
+            return None
+        rows = self.rows(name, stamp)
+        if rows.columns != tuple(col for col in output_cols if col in rows.positions):
+            return None
+
+        terms = self._strings(table["terms"])
+        postings = _Postings(self._section(table["post_offsets"]), self._section(table["post_docs"]),
+                             self._section(table["post_tfs"]), self._section(table["post_starts"]),
+                             self._section(table["post_positions"]))
+
+        bm25 = BM25(table["k1"], table["b"], analyzer)
+        bm25.field_weights = table["field_weights"]
+        bm25.N = table["N"]
+        bm25.avgdl = table["avgdl"]
+        bm25.doc_norms = self._section(table["doc_norms"])
+        bm25.doc_lengths = self._section(table["doc_lengths"])
+        bm25.vocab = _TermMap(_TermIds(terms))
+        bm25.terms = terms
+        bm25.idf = self._section(table["idf"])
+        bm25.max_scores = self._section(table["max_scores"])
+        bm25.postings = postings
+        bm25.doc_freqs = postings.lengths()
+        if "impact_weights" in table:
+            bm25.impact_ordered = True
+            bm25._impacts = _ImpactLists(postings.offsets, self._section(table["impact_weights"]),
+                                         self._section(table["ranked_docs"]), self._section(table["ranked_weights"]))
+        bm25._lexicon = Lexicon.from_tables(terms, bm25.doc_freqs, self._strings(table["deletes"]),
+                                            self._section(table["delete_offsets"]), self._section(table["delete_terms"]))
+        return bm25, rows
+
+
+# ============ CLI SUPPORT ============
+if __name__ == "__main__":
+    import argparse
+    from pathlib import Path
+
+    parser = argparse.ArgumentParser(description="Build the UI Pro Max data snapshot")
+    parser.add_argument("--output", "-o", type=Path, default=SNAPSHOT_FILE, help="Snapshot file")
+
+    args = parser.parse_args()
+    header = build(args.output)
+    print(f"Wrote {args.output} ({args.output.stat().st_size} bytes, {len(header['tables'])} tables)")